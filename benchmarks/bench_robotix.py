@@ -0,0 +1,272 @@
+"""Benchmarks sin pantalla de los caminos críticos de audio, imagen e interfaz.
+
+Uso:
+    python benchmarks/bench_robotix.py                  # todo, guarda en resultados/
+    python benchmarks/bench_robotix.py --filtro ruido   # solo los que contienen "ruido"
+    python benchmarks/bench_robotix.py --comparar benchmarks/resultados/base.json
+
+Cada resultado se guarda como JSON con la versión de git, de modo que dos
+ejecuciones se pueden comparar con --comparar. Si alguna mediana empeora
+más que --umbral, el proceso termina con código 1.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import entorno
+
+CARPETA_RESULTADOS = entorno.CARPETA_RESULTADOS
+
+class Banco:
+    """Ejecuta y registra cada benchmark con calentamiento y repeticiones"""
+    def __init__(self, repeticiones, filtro=None):
+        self.repeticiones = repeticiones
+        self.filtro = filtro
+        self.resultados = {}
+        self.omitidos = {}
+
+    def medir(self, nombre, funcion, preparar=None, repeticiones=None, calentamiento=1):
+        """Mide funcion(); preparar() corre antes de cada repetición sin contar"""
+        if self.filtro and self.filtro not in nombre:
+            return
+        repeticiones = repeticiones or self.repeticiones
+        for _ in range(calentamiento):
+            if preparar:
+                preparar()
+            funcion()
+        tiempos = []
+        for _ in range(repeticiones):
+            if preparar:
+                preparar()
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        self.resultados[nombre] = resumir(tiempos)
+        r = self.resultados[nombre]
+        print(f"  {nombre:<45} mediana {r['mediana_ms']:9.3f} ms  "
+              f"p95 {r['p95_ms']:9.3f} ms  (n={r['n']})")
+
+    def omitir(self, nombre, motivo):
+        if self.filtro and self.filtro not in nombre:
+            return
+        self.omitidos[nombre] = motivo
+        print(f"  {nombre:<45} omitido: {motivo}")
+
+def resumir(tiempos):
+    ordenados = sorted(tiempos)
+    return {
+        "n": len(tiempos),
+        "min_ms": ordenados[0],
+        "mediana_ms": statistics.median(ordenados),
+        "media_ms": statistics.fmean(ordenados),
+        "p95_ms": ordenados[min(len(ordenados) - 1, int(0.95 * len(ordenados)))],
+        "desv_ms": statistics.pstdev(ordenados),
+    }
+
+def bench_ruido(banco, app):
+    print("Ruido")
+    # Banco propio en una carpeta temporal: vaciar su disco no borra los
+    # bucles ya calentados en la caché de la aplicación
+    with tempfile.TemporaryDirectory() as carpeta:
+        _bench_ruido(banco, app, app.NoiseBank(carpeta=carpeta))
+
+def _bench_ruido(banco, app, noise_bank):
+    sample_rate = noise_bank.sample_rate
+    for tipo in ("blanco", "rosa", "marrón"):
+        for duracion in (1, 5, 30):
+            banco.medir(f"ruido.sintetizar.{tipo}.{duracion}s",
+                        lambda t=tipo, d=duracion: app.NoiseSynth(t).generar(d * sample_rate),
+                        repeticiones=max(3, banco.repeticiones // (1 + duracion // 5)))
+        obtener = lambda t=tipo: noise_bank.obtener(t)
+        # Frío: sin caché en disco, como la primera ejecución en un equipo
+        banco.medir(f"ruido.banco_frio.{tipo}", obtener,
+                    preparar=lambda: noise_bank.vaciar(disco=True),
+                    repeticiones=max(3, banco.repeticiones // 4))
+        banco.medir(f"ruido.banco_disco.{tipo}", obtener, preparar=noise_bank.vaciar)
+        banco.medir(f"ruido.banco_memoria.{tipo}", obtener)
+
+def bench_wav(banco, app):
+    print("WAV")
+    terapia = entorno.terapia_sin_interfaz(app)
+    for sonido in ("perro", "gato", "pajaro", "lluvia", "olas", "bosque"):
+        archivo = f"{sonido}.wav"
+        if not app.file_manager.sound_exists(archivo):
+            banco.omitir(f"wav.cargar_frio.{sonido}", "archivo no encontrado")
+            continue
+        ruta = app.file_manager.get_sound_path(archivo)
+
+        def primer_bloque(r=ruta):
+            next(app.audio_cache.cargar(r).bloques())
+
+        # Frío: sin caché, como el primer clic tras arrancar
+        banco.medir(f"wav.cargar_frio.{sonido}", primer_bloque,
+                    preparar=app.audio_cache.vaciar)
+        banco.medir(f"wav.cargar_cache.{sonido}", primer_bloque)
+
+        def reproducir(s=sonido):
+            terapia.reproducir_sonido(s)
+            app.audio_player.detener(0)
+
+        banco.medir(f"wav.reproducir_sonido.{sonido}", reproducir)
+    app.audio_player.cerrar()
+
+def bench_imagenes(banco, app):
+    print("Imágenes")
+    pygame = app.pygame
+    tamano = app.VisorRelajacion.TAMANO
+    for archivo in app.VisorRelajacion.IMAGENES:
+        if not app.file_manager.image_exists(archivo):
+            banco.omitir(f"imagen.decodificar_escalar.{archivo}", "archivo no encontrado")
+            continue
+        ruta = app.file_manager.get_image_path(archivo)
+
+        def decodificar(r=ruta):
+            pygame.transform.smoothscale(pygame.image.load(r), tamano)
+
+        banco.medir(f"imagen.decodificar_escalar.{archivo}", decodificar)
+        app.image_cache.guardar(ruta, tamano, "smoothscale",
+                                pygame.transform.smoothscale(pygame.image.load(ruta), tamano))
+        banco.medir(f"imagen.cache_disco.{archivo}",
+                    lambda r=ruta: app.image_cache.obtener(r, tamano, "smoothscale"))
+        banco.medir(f"imagen.cargador.{archivo}",
+                    lambda a=archivo: app.ImageLoader._cargar_una(a, tamano, (0, 0, 0)))
+
+def bench_interfaz(banco, app):
+    print("Interfaz (Tk)")
+    nombres = ["boton.construir", "boton.construir_sin_cache",
+               "pantalla.MenuPrincipal", "pantalla.TerapiaAuditiva", "pantalla.TerapiaVisual"]
+    if not entorno.preparar_display():
+        for nombre in nombres:
+            banco.omitir(nombre, "sin DISPLAY ni Xvfb")
+        return
+    tk = app.tk
+    root = tk.Tk()
+    root.withdraw()
+    # Los diálogos bloquearían el benchmark
+    for dialogo in ("showinfo", "showwarning", "showerror"):
+        setattr(app.messagebox, dialogo, lambda *a, **k: None)
+    marco = tk.Frame(root, bg=app.COLOR_FONDO)
+    marco.pack()
+
+    def construir_boton():
+        app.SemicuadradoButton(marco, text="Botón", bg="#3498DB", active_bg="#2980B9",
+                               width=150, height=80, corner_radius=25).pack()
+        root.update_idletasks()
+
+    def vaciar_marco():
+        for widget in marco.winfo_children():
+            widget.destroy()
+
+    banco.medir("boton.construir", construir_boton, preparar=vaciar_marco,
+                repeticiones=banco.repeticiones * 5)
+
+    def sin_caras():
+        vaciar_marco()
+        app.button_faces.vaciar()
+
+    banco.medir("boton.construir_sin_cache", construir_boton, preparar=sin_caras,
+                repeticiones=banco.repeticiones * 5)
+    vaciar_marco()
+
+    for clase in (app.MenuPrincipal, app.TerapiaAuditiva, app.TerapiaVisual):
+        nombre = clase.__name__
+        ventanas = []
+
+        def construir(c=clase):
+            ventana = tk.Toplevel(root)
+            ventanas.append((ventana, c(ventana, root)))
+            ventana.update_idletasks()
+
+        def destruir():
+            while ventanas:
+                ventanas.pop()[0].destroy()
+
+        # Construcción completa: ventana nueva, todas las pantallas desde cero
+        banco.medir(f"pantalla.{nombre}", construir, preparar=destruir)
+        # Volver a la pantalla ya construida
+        ventana, instancia = ventanas[-1]
+
+        def volver(v=ventana, i=instancia):
+            i.clear_and_setup()
+            v.update_idletasks()
+
+        banco.medir(f"pantalla.{nombre}.volver", volver, repeticiones=banco.repeticiones * 5)
+        destruir()
+
+    app.audio_player.cerrar()
+    root.destroy()
+
+def guardar(banco, destino=None):
+    os.makedirs(CARPETA_RESULTADOS, exist_ok=True)
+    version = entorno.version_git()
+    destino = destino or os.path.join(
+        CARPETA_RESULTADOS, time.strftime("%Y%m%d-%H%M%S") + f"_{version}.json")
+    datos = {
+        "version": version,
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "repeticiones": banco.repeticiones,
+        "resultados": banco.resultados,
+        "omitidos": banco.omitidos,
+    }
+    with open(destino, "w", encoding="utf-8") as f:
+        json.dump(datos, f, indent=2, ensure_ascii=False)
+    return destino
+
+def comparar(actual, ruta_base, umbral):
+    """Imprime la razón de medianas frente a la base; devuelve las regresiones"""
+    with open(ruta_base, encoding="utf-8") as f:
+        base = json.load(f)
+    print(f"\nComparación con {base.get('version', '?')} ({ruta_base})")
+    regresiones = []
+    for nombre, r in sorted(actual.items()):
+        anterior = base["resultados"].get(nombre)
+        if anterior is None:
+            print(f"  {nombre:<45} nuevo")
+            continue
+        razon = r["mediana_ms"] / anterior["mediana_ms"] if anterior["mediana_ms"] else 1.0
+        marca = ""
+        if razon > 1 + umbral:
+            marca = "  <-- REGRESIÓN"
+            regresiones.append(nombre)
+        elif razon < 1 - umbral:
+            marca = "  mejora"
+        print(f"  {nombre:<45} {anterior['mediana_ms']:9.3f} -> {r['mediana_ms']:9.3f} ms "
+              f"(x{razon:.2f}){marca}")
+    return regresiones
+
+GRUPOS = {"ruido": bench_ruido, "wav": bench_wav, "imagen": bench_imagenes,
+          "interfaz": bench_interfaz}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--filtro", help="solo benchmarks cuyo nombre contenga este texto")
+    parser.add_argument("--grupos", default=",".join(GRUPOS),
+                        help="grupos a ejecutar, separados por comas")
+    parser.add_argument("--salida", help="ruta del JSON de resultados")
+    parser.add_argument("--comparar", help="JSON de una ejecución anterior")
+    parser.add_argument("--umbral", type=float, default=0.10,
+                        help="empeoramiento relativo que cuenta como regresión")
+    args = parser.parse_args()
+
+    app = entorno.cargar_aplicacion()
+    banco = Banco(args.repeticiones, args.filtro)
+    for grupo in args.grupos.split(","):
+        GRUPOS[grupo.strip()](banco, app)
+
+    ruta = guardar(banco, args.salida)
+    print(f"\nResultados guardados en {ruta}")
+    if args.comparar:
+        if comparar(banco.resultados, args.comparar, args.umbral):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Entorno sin pantalla ni tarjeta de sonido para los benchmarks.
+
+Configura SDL con drivers dummy, arranca un Xvfb si hay uno disponible y
+no hay DISPLAY, y sustituye PyAudio por un sumidero nulo antes de que la
+aplicación lo importe.
+"""
+import atexit
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import types
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CARPETA_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+class NullStream:
+    """Stream de salida que descarta el audio, con el ritmo opcional de una tarjeta real"""
+    def __init__(self, rate=44100, channels=2, format=None, tiempo_real=False, **kwargs):
+        self.rate = rate
+        self.channels = channels
+        self.sample_width = NullPyAudio.ANCHOS.get(format, 2)
+        self.tiempo_real = tiempo_real
+        self.bytes_escritos = 0
+        self.activo = True
+
+    def write(self, datos, num_frames=None, exception_on_underflow=False):
+        self.bytes_escritos += len(datos)
+        self.recibir(time.perf_counter(), datos)
+        if self.tiempo_real:
+            # Bloquea lo que tardaría el hardware en reproducir el bloque
+            frames = len(datos) // (self.sample_width * self.channels)
+            time.sleep(frames / self.rate)
+
+    def recibir(self, instante, datos):
+        """Punto de extensión para sumideros que inspeccionan el audio"""
+
+    def stop_stream(self):
+        self.activo = False
+
+    def start_stream(self):
+        self.activo = True
+
+    def is_active(self):
+        return self.activo
+
+    def is_stopped(self):
+        return not self.activo
+
+    def get_write_available(self):
+        return 4096
+
+    def close(self):
+        self.activo = False
+
+class NullPyAudio:
+    """Sustituto mínimo de pyaudio.PyAudio que abre NullStreams"""
+    paUInt8, paInt16, paInt24, paFloat32, paInt32 = 32, 8, 4, 1, 2
+    ANCHOS = {paUInt8: 1, paInt16: 2, paInt24: 3, paFloat32: 4, paInt32: 4}
+    clase_stream = NullStream
+    tiempo_real = False
+
+    def open(self, rate=44100, channels=2, format=None, **kwargs):
+        return self.clase_stream(rate=rate, channels=channels, format=format,
+                                 tiempo_real=self.tiempo_real, **kwargs)
+
+    def get_format_from_width(self, ancho, unsigned=True):
+        return {1: self.paUInt8, 2: self.paInt16, 3: self.paInt24, 4: self.paFloat32}[ancho]
+
+    def get_sample_size(self, formato):
+        return self.ANCHOS[formato]
+
+    def terminate(self):
+        pass
+
+class Captura:
+    """Detecta el primer sample audible que llega al dispositivo tras un disparo.
+
+    El stream de bucle local avanza al ritmo de una tarjeta real, de modo que
+    un bloque escrito en el instante t empieza a sonar en t y su frame i
+    suena en t + i / rate.
+    """
+    def __init__(self, umbral=64):
+        self.umbral = umbral
+        self._lock = threading.Lock()
+        self._t_disparo = None
+        self.latencia = None
+        self.listo = threading.Event()
+        self.ultima_escritura = 0.0
+
+    def armar(self, t_disparo):
+        with self._lock:
+            self.latencia = None
+            self.listo.clear()
+            self._t_disparo = t_disparo
+
+    def procesar(self, instante, datos, rate, channels, sample_width):
+        self.ultima_escritura = time.perf_counter()
+        with self._lock:
+            if self._t_disparo is None:
+                return
+            # El mezclador siempre entrega int16 estéreo
+            muestras = np.abs(np.frombuffer(datos, dtype=np.int16).astype(np.int32))
+            audibles = np.flatnonzero(muestras > self.umbral)
+            if not audibles.size:
+                return
+            frame = int(audibles[0]) // channels
+            self.latencia = instante + frame / rate - self._t_disparo
+            self._t_disparo = None
+            self.listo.set()
+
+    def esperar_silencio(self, inactividad=0.1, limite=5.0):
+        """Espera a que el mezclador deje de escribir durante `inactividad` segundos"""
+        inicio = time.perf_counter()
+        fin = inicio + limite
+        while time.perf_counter() < fin:
+            # Cuenta desde la llamada: un bloque aún sin escribir también cuenta
+            if time.perf_counter() - max(self.ultima_escritura, inicio) >= inactividad:
+                return True
+            time.sleep(0.01)
+        return False
+
+class LoopbackStream(NullStream):
+    """Stream a ritmo real que entrega cada bloque escrito a la Captura"""
+    captura = None
+
+    def recibir(self, instante, datos):
+        if self.captura is not None:
+            self.captura.procesar(instante, datos, self.rate, self.channels, self.sample_width)
+
+class LoopbackPyAudio(NullPyAudio):
+    clase_stream = LoopbackStream
+    tiempo_real = True
+
+def modulo_pyaudio(clase=NullPyAudio):
+    """Módulo con la interfaz de pyaudio que usa la aplicación"""
+    modulo = types.ModuleType("pyaudio")
+    modulo.PyAudio = clase
+    for nombre in ("paUInt8", "paInt16", "paInt24", "paFloat32", "paInt32"):
+        setattr(modulo, nombre, getattr(NullPyAudio, nombre))
+    return modulo
+
+def _display_libre():
+    for numero in range(90, 120):
+        if not os.path.exists(f"/tmp/.X11-unix/X{numero}") and \
+                not os.path.exists(f"/tmp/.X{numero}-lock"):
+            return numero
+    return None
+
+def preparar_display():
+    """Devuelve True si Tk puede abrir ventanas, arrancando Xvfb si hace falta"""
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        return True
+    xvfb = shutil.which("Xvfb")
+    numero = _display_libre()
+    if xvfb is None or numero is None:
+        return False
+    proceso = subprocess.Popen([xvfb, f":{numero}", "-screen", "0", "1024x768x24",
+                                "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    atexit.register(proceso.terminate)
+    for _ in range(50):
+        if os.path.exists(f"/tmp/.X11-unix/X{numero}"):
+            os.environ["DISPLAY"] = f":{numero}"
+            return True
+        if proceso.poll() is not None:
+            return False
+        time.sleep(0.1)
+    return False
+
+def version_git():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=RAIZ, stderr=subprocess.DEVNULL,
+                                       text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocida"
+
+def terapia_sin_interfaz(app):
+    """TerapiaAuditiva sin ventana, para llamar a sus manejadores de sonido"""
+    terapia = app.TerapiaAuditiva.__new__(app.TerapiaAuditiva)
+    terapia.root = None
+    terapia.parent_window = None
+    terapia.ejercicio_actual = None
+    return terapia
+
+def cargar_aplicacion(clase_pyaudio=NullPyAudio):
+    """Importa robotixV4p con PyAudio reemplazado por el sumidero indicado"""
+    if RAIZ not in sys.path:
+        sys.path.insert(0, RAIZ)
+    import robotixV4p as app
+    # La aplicación importa pyaudio de forma perezosa por su nombre global
+    app.pyaudio = modulo_pyaudio(clase_pyaudio)
+    app.resource_manager.cleanup_pyaudio()
+    return app
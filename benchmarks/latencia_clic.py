@@ -0,0 +1,212 @@
+"""Latencia clic -> sonido medida con un dispositivo de bucle local.
+
+PyAudio se sustituye por un stream que avanza al ritmo de una tarjeta real
+y detecta el primer sample audible tras cada clic sintético. Se mide cada
+camino que dispara sonido: botones de ruido, sonidos ambientales y de
+animales, y "🔊 Repetir".
+
+Uso:
+    python benchmarks/latencia_clic.py                 # 50 clics por camino
+    python benchmarks/latencia_clic.py --clics 200 --modo directo
+
+En modo "tk" se pulsan los botones reales de TerapiaAuditiva (necesita
+DISPLAY o Xvfb); en modo "directo" se llaman los mismos manejadores sin
+interfaz. "auto" elige tk si hay pantalla.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import entorno
+
+# (camino, pantalla que contiene el botón, texto del botón, sonido)
+CAMINOS = [
+    ("ruido.blanco", "abrir_ruidos_terapeuticos", "Ruido Blanco", "blanco"),
+    ("ruido.rosa", "abrir_ruidos_terapeuticos", "Ruido Rosa", "rosa"),
+    ("ruido.marron", "abrir_ruidos_terapeuticos", "Ruido Marrón", "marrón"),
+    ("ambiental.lluvia", "abrir_sonidos_ambientales", "Lluvia", "lluvia"),
+    ("ambiental.olas", "abrir_sonidos_ambientales", "Olas del Mar", "olas"),
+    ("ambiental.bosque", "abrir_sonidos_ambientales", "Bosque", "bosque"),
+    ("animal.perro", "abrir_sonidos_animales", "Perro", "perro"),
+    ("animal.gato", "abrir_sonidos_animales", "Gato", "gato"),
+    ("animal.pajaro", "abrir_sonidos_animales", "Pájaro", "pajaro"),
+    ("repetir.blanco", "abrir_ruidos_terapeuticos", "Ruido Blanco", "blanco"),
+    ("repetir.perro", "abrir_sonidos_animales", "Perro", "perro"),
+]
+
+class DisparadorDirecto:
+    """Llama a los manejadores de TerapiaAuditiva sin construir la interfaz"""
+    def __init__(self, app):
+        self.app = app
+        self.terapia = entorno.terapia_sin_interfaz(app)
+        for tipo in app.NoiseBank.ARCHIVOS:
+            app.noise_bank.obtener(tipo)
+
+    def preparar(self, camino, pantalla, texto, sonido):
+        if camino.startswith("repetir."):
+            # Pregunta en curso; el sonido inicial se corta antes del clic medido
+            self.terapia.ejercicio_actual = self.app.EjercicioIdentificarSonido(
+                sonido, on_evento=self.terapia.on_evento_ejercicio)
+            self.terapia.ejercicio_actual.iniciar()
+            self.terapia.ejercicio_actual.pedir_respuesta()
+
+    def clic(self, camino, pantalla, texto, sonido):
+        if camino.startswith("repetir."):
+            self.terapia.repetir_sonido()
+        elif camino.startswith("ruido."):
+            self.terapia.reproducir_ruido(sonido)
+        else:
+            self.terapia.reproducir_sonido(sonido)
+
+    def procesar_eventos(self):
+        pass
+
+    def cerrar(self):
+        pass
+
+class DisparadorTk:
+    """Pulsa los SemicuadradoButton reales de una ventana de TerapiaAuditiva"""
+    def __init__(self, app):
+        self.app = app
+        for dialogo in ("showinfo", "showwarning", "showerror"):
+            setattr(app.messagebox, dialogo, lambda *a, **k: None)
+        self.root = app.tk.Tk()
+        self.root.withdraw()
+        self.ventana = app.tk.Toplevel(self.root)
+        self.terapia = app.TerapiaAuditiva(self.ventana, self.root)
+        app.audio_player.vincular_tk(self.root)
+        for tipo in app.NoiseBank.ARCHIVOS:
+            app.noise_bank.obtener(tipo)
+        self.procesar_eventos()
+
+    def _boton(self, texto):
+        pendientes = [self.terapia.pantallas.actual]
+        while pendientes:
+            widget = pendientes.pop()
+            if isinstance(widget, self.app.SemicuadradoButton) and widget.cget("text") == texto:
+                return widget
+            pendientes.extend(widget.winfo_children())
+        raise LookupError(f"No hay botón '{texto}' en la pantalla actual")
+
+    def _pulsar(self, texto):
+        boton = self._boton(texto)
+        boton._on_press(None)
+        boton._on_release(None)
+
+    def preparar(self, camino, pantalla, texto, sonido):
+        getattr(self.terapia, pantalla)()
+        if camino.startswith("repetir."):
+            # Abre la pregunta con el sonido; el clic medido será "Repetir"
+            self._pulsar(texto)
+        self.procesar_eventos()
+
+    def clic(self, camino, pantalla, texto, sonido):
+        self._pulsar("🔊 Repetir" if camino.startswith("repetir.") else texto)
+
+    def procesar_eventos(self):
+        self.root.update()
+
+    def cerrar(self):
+        self.root.destroy()
+
+def medir_camino(disparador, captura, app, camino, clics, limite):
+    _, pantalla, texto, sonido = camino
+    latencias = []
+    perdidos = 0
+    for i in range(clics + 1):
+        app.audio_player.detener(0)
+        captura.esperar_silencio()
+        disparador.preparar(*camino)
+        app.audio_player.detener(0)
+        captura.esperar_silencio()
+        # Desfase aleatorio respecto al ritmo de bloques del mezclador
+        time.sleep(random.uniform(0, app.AudioPlayer.FRAMES_POR_BLOQUE / app.AudioPlayer.SAMPLE_RATE))
+        captura.armar(time.perf_counter())
+        disparador.clic(*camino)
+        fin = time.perf_counter() + limite
+        while not captura.listo.wait(0.005) and time.perf_counter() < fin:
+            disparador.procesar_eventos()
+        if i == 0:
+            # El primer clic solo calienta cachés y el pool de streams
+            continue
+        if captura.latencia is None:
+            perdidos += 1
+        else:
+            latencias.append(captura.latencia * 1000)
+    captura.armar(None)
+    return latencias, perdidos
+
+def percentiles(latencias):
+    if len(latencias) < 2:
+        valor = latencias[0] if latencias else None
+        return {"p50_ms": valor, "p95_ms": valor, "p99_ms": valor}
+    cortes = statistics.quantiles(latencias, n=100, method="inclusive")
+    return {"p50_ms": cortes[49], "p95_ms": cortes[94], "p99_ms": cortes[98]}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clics", type=int, default=50, help="clics medidos por camino")
+    parser.add_argument("--modo", choices=("auto", "tk", "directo"), default="auto")
+    parser.add_argument("--filtro", help="solo caminos cuyo nombre contenga este texto")
+    parser.add_argument("--umbral-silencio", type=int, default=64,
+                        help="amplitud int16 a partir de la cual un sample es audible")
+    parser.add_argument("--limite", type=float, default=2.0,
+                        help="segundos sin sonido tras los que un clic cuenta como perdido")
+    parser.add_argument("--salida", help="ruta del JSON de resultados")
+    args = parser.parse_args()
+
+    captura = entorno.Captura(args.umbral_silencio)
+    entorno.LoopbackStream.captura = captura
+    app = entorno.cargar_aplicacion(entorno.LoopbackPyAudio)
+
+    modo = args.modo
+    if modo == "auto":
+        modo = "tk" if entorno.preparar_display() else "directo"
+    elif modo == "tk" and not entorno.preparar_display():
+        sys.exit("Modo tk: no hay DISPLAY ni Xvfb")
+    disparador = DisparadorTk(app) if modo == "tk" else DisparadorDirecto(app)
+    print(f"Modo {modo}, {args.clics} clics por camino")
+    print(f"  {'camino':<20} {'p50':>8} {'p95':>8} {'p99':>8} {'máx':>8}  perdidos")
+
+    resultados = {}
+    try:
+        for camino in CAMINOS:
+            nombre = camino[0]
+            if args.filtro and args.filtro not in nombre:
+                continue
+            latencias, perdidos = medir_camino(disparador, captura, app, camino,
+                                               args.clics, args.limite)
+            r = percentiles(latencias)
+            r.update(n=len(latencias), perdidos=perdidos,
+                     max_ms=max(latencias) if latencias else None,
+                     media_ms=statistics.fmean(latencias) if latencias else None)
+            resultados[nombre] = r
+            if latencias:
+                print(f"  {nombre:<20} {r['p50_ms']:8.2f} {r['p95_ms']:8.2f} "
+                      f"{r['p99_ms']:8.2f} {r['max_ms']:8.2f}  {perdidos}")
+            else:
+                print(f"  {nombre:<20} sin sonido en {perdidos} clics")
+    finally:
+        app.audio_player.cerrar()
+        disparador.cerrar()
+
+    os.makedirs(entorno.CARPETA_RESULTADOS, exist_ok=True)
+    version = entorno.version_git()
+    destino = args.salida or os.path.join(
+        entorno.CARPETA_RESULTADOS,
+        "latencia_" + time.strftime("%Y%m%d-%H%M%S") + f"_{version}.json")
+    with open(destino, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                   "python": platform.python_version(), "plataforma": platform.platform(),
+                   "modo": modo, "clics": args.clics, "resultados": resultados},
+                  f, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en {destino}")
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,57 @@
+import time
+# Referencia para medir el tiempo hasta la primera ventana
+_INICIO_ARRANQUE = time.perf_counter()
 import tkinter as tk
 from tkinter import messagebox, ttk
-import pygame
-import time
+import importlib
+import importlib.util
 import os
 import random
 import sys
 import math
-import wave
-import numpy as np
-import pyaudio
+import struct
+import mmap
 import tempfile
 import atexit
+import multiprocessing
+import hashlib
+import json
+import socket
+import uuid
+from contextlib import contextmanager
+import base64
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 import threading
-from PIL import Image, ImageTk
+import queue
+from collections import OrderedDict
+
+class _ModuloPerezoso:
+    """Importa un módulo pesado la primera vez que se usa uno de sus atributos.
+
+    Al cargarlo reemplaza el nombre global por el módulo real, así que el
+    resto de accesos ya no pasan por aquí.
+    """
+    def __init__(self, nombre, alias):
+        self._nombre = nombre
+        self._alias = alias
+
+    def _cargar(self):
+        modulo = importlib.import_module(self._nombre)
+        globals()[self._alias] = modulo
+        return modulo
+
+    def __getattr__(self, atributo):
+        return getattr(self._cargar(), atributo)
+
+# Bienvenida y el menú no los necesitan: se importan al entrar en cada terapia
+np = _ModuloPerezoso("numpy", "np")
+pygame = _ModuloPerezoso("pygame", "pygame")
+pyaudio = _ModuloPerezoso("pyaudio", "pyaudio")
+# Solo los usan las sesiones sin interfaz (--estaciones-virtuales)
+asyncio = _ModuloPerezoso("asyncio", "asyncio")
+# Solo lo usa el hilo escritor de ResultStore
+sqlite3 = _ModuloPerezoso("sqlite3", "sqlite3")
 
 # Configuration - Reduced sizes
 FUENTE_TITULO = ("Comic Sans MS", 18)  # Reduced from 24
@@ -24,12 +63,27 @@ COLOR_BOTON_VOLVER = "#F08080"
 COLOR_BOTON_VOLVER_ACTIVO = "#CD5C5C"
 COLOR_BOTON_PRINCIPAL = "#3498DB"
 COLOR_BOTON_PRINCIPAL_ACTIVO = "#2980B9"
+# Paletas para el fondo animado de la terapia visual
+PALETAS_FONDO = {
+    "arcoiris": ["#FF0000", "#FF7F00", "#FFFF00", "#00FF00",
+                 "#0000FF", "#4B0082", "#9400D3"],
+    "calma": ["#1ABC9C", "#3498DB", "#9B59B6", "#34495E"],
+    "calido": ["#FFA07A", "#FFD1DC", "#F08080", "#FFA500"],
+}
+
+# Segundos que un stream de salida sin uso permanece abierto en el pool
+STREAM_IDLE_TIMEOUT = 30
+# Memoria máxima que puede ocupar el audio mapeado que se conserva en caché
+AUDIO_CACHE_MAX_BYTES = 32 * 1024 * 1024
 
 class ResourceManager:
-    """Gestiona recursos de audio y pygame de forma segura"""
+    """Gestiona recursos de audio de forma segura"""
     def __init__(self):
         self.pyaudio_instance = None
-        self.pygame_initialized = False
+        # Streams de salida calientes: (rate, sample_width, channels) -> [(stream, ultimo_uso)]
+        self.output_streams = {}
+        self.streams_lock = threading.Lock()
+        self.idle_timer = None
         
     def get_pyaudio(self):
         if self.pyaudio_instance is None:
@@ -40,30 +94,192 @@ class ResourceManager:
                 messagebox.showerror("Error de Audio", f"No se pudo inicializar PyAudio: {str(e)}")
         return self.pyaudio_instance
     
-    def init_pygame(self):
-        if not self.pygame_initialized:
-            try:
-                pygame.init()
-                self.pygame_initialized = True
-                atexit.register(self.cleanup_pygame)
-            except Exception as e:
-                messagebox.showerror("Error de Video", f"No se pudo inicializar Pygame: {str(e)}")
-    
+    def get_output_stream(self, rate, sample_width, channels):
+        """Devuelve un stream de salida del pool o abre uno nuevo"""
+        clave = (rate, sample_width, channels)
+        with self.streams_lock:
+            libres = self.output_streams.get(clave)
+            while libres:
+                stream, _ = libres.pop()
+                try:
+                    if stream.is_stopped():
+                        stream.start_stream()
+                except Exception:
+                    # El stream quedó inservible: se cierra y se prueba el siguiente
+                    self._close_stream(stream)
+                    continue
+                return stream
+            p = self.pyaudio_instance
+        if p is None:
+            return None
+        return p.open(
+            format=p.get_format_from_width(sample_width),
+            channels=channels,
+            rate=rate,
+            output=True
+        )
+
+    def release_output_stream(self, stream, rate, sample_width, channels):
+        """Devuelve al pool un stream obtenido con get_output_stream"""
+        try:
+            stream.stop_stream()
+        except Exception:
+            self.discard_output_stream(stream)
+            return
+        with self.streams_lock:
+            if self.pyaudio_instance is None:
+                # PyAudio ya se liberó, el stream no puede reutilizarse
+                self._close_stream(stream)
+                return
+            clave = (rate, sample_width, channels)
+            self.output_streams.setdefault(clave, []).append((stream, time.monotonic()))
+            self._schedule_idle_cleanup()
+
+    def discard_output_stream(self, stream):
+        """Cierra un stream que quedó en mal estado en lugar de reutilizarlo"""
+        self._close_stream(stream)
+
+    def close_output_streams(self):
+        with self.streams_lock:
+            if self.idle_timer is not None:
+                self.idle_timer.cancel()
+                self.idle_timer = None
+            for libres in self.output_streams.values():
+                for stream, _ in libres:
+                    self._close_stream(stream)
+            self.output_streams.clear()
+
+    def _schedule_idle_cleanup(self):
+        # Debe llamarse con streams_lock tomado
+        if self.idle_timer is None:
+            self.idle_timer = threading.Timer(STREAM_IDLE_TIMEOUT, self._close_idle_streams)
+            self.idle_timer.daemon = True
+            self.idle_timer.start()
+
+    def _close_idle_streams(self):
+        limite = time.monotonic() - STREAM_IDLE_TIMEOUT
+        with self.streams_lock:
+            self.idle_timer = None
+            for clave in list(self.output_streams):
+                vigentes = []
+                for stream, ultimo_uso in self.output_streams[clave]:
+                    if ultimo_uso <= limite:
+                        self._close_stream(stream)
+                    else:
+                        vigentes.append((stream, ultimo_uso))
+                if vigentes:
+                    self.output_streams[clave] = vigentes
+                else:
+                    del self.output_streams[clave]
+            if self.output_streams:
+                self._schedule_idle_cleanup()
+
+    @staticmethod
+    def _close_stream(stream):
+        try:
+            stream.close()
+        except:
+            pass
+
     def cleanup_pyaudio(self):
+        self.close_output_streams()
         if self.pyaudio_instance:
             try:
                 self.pyaudio_instance.terminate()
                 self.pyaudio_instance = None
             except:
                 pass
-    
-    def cleanup_pygame(self):
-        if self.pygame_initialized:
+
+class AssetInfo:
+    """Metadatos de un archivo de recursos indexado"""
+    def __init__(self, ruta, tamano, mtime_ns, formato):
+        self.ruta = ruta
+        self.tamano = tamano
+        self.mtime_ns = mtime_ns
+        self.formato = formato
+
+class AssetIndex:
+    """Índice de recursos de un tipo por nombre, sin distinguir mayúsculas.
+
+    Las carpetas se recorren una sola vez; refrescar() solo vuelve a leer las
+    que cambiaron desde el último recorrido. Las búsquedas son consultas a
+    un diccionario, sin llamadas al sistema. Solo se indexan los archivos
+    con una de las extensiones indicadas.
+    """
+    def __init__(self, raices, extensiones):
+        # Raíces en orden de prioridad: la primera gana ante nombres repetidos
+        self.raices = list(raices)
+        self.extensiones = set(extensiones)
+        self._por_raiz = {}  # raiz -> (mtime_ns, {nombre_minusculas: AssetInfo})
+        self._indice = {}
+        self.refrescar()
+
+    def refrescar(self):
+        """Actualiza el índice; devuelve True si hubo cambios.
+
+        Las carpetas modificadas se vuelven a recorrer. En las demás se
+        vuelve a consultar cada archivo, porque sobrescribir un archivo en
+        su sitio no cambia el mtime de la carpeta.
+        """
+        cambios = False
+        for raiz in self.raices:
             try:
-                pygame.quit()
-                self.pygame_initialized = False
-            except:
-                pass
+                mtime = os.stat(raiz).st_mtime_ns
+            except OSError:
+                mtime = None
+            previo = self._por_raiz.get(raiz)
+            if previo is not None and previo[0] == mtime:
+                if mtime is not None and self._actualizar(previo[1]):
+                    cambios = True
+                continue
+            self._por_raiz[raiz] = (mtime, self._recorrer(raiz) if mtime is not None else {})
+            cambios = True
+        if cambios:
+            indice = {}
+            for raiz in reversed(self.raices):
+                indice.update(self._por_raiz[raiz][1])
+            self._indice = indice
+        return cambios
+
+    def _recorrer(self, raiz):
+        archivos = {}
+        try:
+            entradas = list(os.scandir(raiz))
+        except OSError:
+            return archivos
+        for entrada in entradas:
+            formato = os.path.splitext(entrada.name)[1][1:].lower()
+            if formato not in self.extensiones:
+                continue
+            try:
+                if not entrada.is_file():
+                    continue
+                info = entrada.stat()
+            except OSError:
+                continue
+            archivos[entrada.name.lower()] = AssetInfo(entrada.path, info.st_size,
+                                                       info.st_mtime_ns, formato)
+        return archivos
+
+    @staticmethod
+    def _actualizar(archivos):
+        """Renueva los metadatos de los archivos sobrescritos; True si alguno cambió"""
+        cambios = False
+        for nombre, asset in list(archivos.items()):
+            try:
+                info = os.stat(asset.ruta)
+            except OSError:
+                del archivos[nombre]
+                cambios = True
+                continue
+            if (info.st_size, info.st_mtime_ns) != (asset.tamano, asset.mtime_ns):
+                archivos[nombre] = AssetInfo(asset.ruta, info.st_size,
+                                             info.st_mtime_ns, asset.formato)
+                cambios = True
+        return cambios
+
+    def buscar(self, nombre):
+        return self._indice.get(nombre.lower())
 
 class FileManager:
     """Gestiona archivos y rutas de la aplicación"""
@@ -71,126 +287,2176 @@ class FileManager:
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
         self.sounds_dir = os.path.join(self.base_dir, "sounds")
         self.images_dir = os.path.join(self.base_dir, "images")
+        self.cache_dir = os.path.join(self.base_dir, "cache")
         self.create_directories()
+        # Las carpetas dedicadas tienen prioridad; la raíz del proyecto es el respaldo
+        self.sonidos = AssetIndex([self.sounds_dir, self.base_dir], {"wav"})
+        self.imagenes = AssetIndex([self.images_dir, self.base_dir],
+                                   {"jpg", "jpeg", "png", "bmp", "gif"})
     
     def create_directories(self):
         os.makedirs(self.sounds_dir, exist_ok=True)
         os.makedirs(self.images_dir, exist_ok=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
+    
+    def refresh_assets(self):
+        cambios_sonidos = self.sonidos.refrescar()
+        cambios_imagenes = self.imagenes.refrescar()
+        return cambios_sonidos or cambios_imagenes
     
     def get_sound_path(self, filename):
-        return os.path.join(self.sounds_dir, filename)
+        info = self.sonidos.buscar(filename)
+        return info.ruta if info else os.path.join(self.sounds_dir, filename)
     
     def get_image_path(self, filename):
-        return os.path.join(self.images_dir, filename)
+        info = self.imagenes.buscar(filename)
+        return info.ruta if info else os.path.join(self.images_dir, filename)
+    
+    def get_cache_path(self, filename):
+        return os.path.join(self.cache_dir, filename)
+    
+    def write_cache_file(self, filename, data, carpeta=None):
+        """Escribe un archivo de caché de forma atómica, por omisión en cache_dir"""
+        carpeta = carpeta or self.cache_dir
+        tmp = tempfile.NamedTemporaryFile(dir=carpeta, delete=False)
+        try:
+            with tmp:
+                tmp.write(data)
+            os.replace(tmp.name, os.path.join(carpeta, filename))
+        except BaseException:
+            # No dejar archivos tmp* a medias en la carpeta de caché
+            try:
+                os.remove(tmp.name)
+            except OSError:
+                pass
+            raise
     
     def sound_exists(self, filename):
-        return os.path.exists(self.get_sound_path(filename))
+        return self.sonidos.buscar(filename) is not None
     
     def image_exists(self, filename):
-        return os.path.exists(self.get_image_path(filename))
+        return self.imagenes.buscar(filename) is not None
 
 # Instancias globales
 resource_manager = ResourceManager()
 file_manager = FileManager()
 
-class SemicuadradoButton(tk.Canvas):
+class _SpanNulo:
+    """Span que no mide nada; se usa cuando la instrumentación está apagada"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_SPAN_NULO = _SpanNulo()
+
+class Metrics:
+    """Instrumentación opcional: spans, contadores e histogramas de tiempos.
+
+    Se activa con la variable de entorno ROBOTIX_METRICAS (1 para guardar en
+    la carpeta metricas/ del proyecto, o la ruta de otra carpeta). Al salir
+    se escribe un JSON por sesión y proceso. Apagada, cada llamada termina
+    en una comprobación de self.activo.
+    """
+    # Límites superiores de los cubos del histograma, en milisegundos
+    CUBOS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self, destino=None):
+        self.activo = bool(destino)
+        self.destino = destino
+        self.inicio = time.time()
+        self._lock = threading.Lock()
+        self._contadores = {}
+        self._histogramas = {}
+        self._marcas = {}
+        if self.activo:
+            atexit.register(self.guardar)
+
+    @classmethod
+    def desde_entorno(cls):
+        valor = os.environ.get("ROBOTIX_METRICAS", "")
+        if not valor or valor == "0":
+            return cls()
+        if valor == "1":
+            valor = os.path.join(file_manager.base_dir, "metricas")
+        return cls(valor)
+
+    def span(self, nombre):
+        """Context manager que registra la duración del bloque en `nombre`"""
+        if not self.activo:
+            return _SPAN_NULO
+        return self._span(nombre)
+
+    @contextmanager
+    def _span(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nombre, time.perf_counter() - inicio)
+
+    def registrar(self, nombre, segundos):
+        """Añade una duración al histograma `nombre`"""
+        if not self.activo:
+            return
+        ms = segundos * 1000
+        with self._lock:
+            h = self._histogramas.get(nombre)
+            if h is None:
+                h = self._histogramas[nombre] = {
+                    "n": 0, "total_ms": 0.0, "min_ms": ms, "max_ms": ms,
+                    "cubos": [0] * (len(self.CUBOS_MS) + 1)}
+            h["n"] += 1
+            h["total_ms"] += ms
+            h["min_ms"] = min(h["min_ms"], ms)
+            h["max_ms"] = max(h["max_ms"], ms)
+            i = 0
+            while i < len(self.CUBOS_MS) and ms > self.CUBOS_MS[i]:
+                i += 1
+            h["cubos"][i] += 1
+
+    def registrar_desde(self, nombre, inicio):
+        """Registra el tiempo transcurrido desde un perf_counter() previo"""
+        if self.activo and inicio is not None:
+            self.registrar(nombre, time.perf_counter() - inicio)
+
+    def contar(self, nombre, n=1):
+        if not self.activo:
+            return
+        with self._lock:
+            self._contadores[nombre] = self._contadores.get(nombre, 0) + n
+
+    def marcar(self, nombre):
+        """Guarda el instante de un evento (p. ej. un clic) para medirlo después"""
+        if self.activo:
+            self._marcas[nombre] = time.perf_counter()
+
+    def desmarcar(self, nombre):
+        if self.activo:
+            self._marcas.pop(nombre, None)
+
+    def marca(self, nombre):
+        return self._marcas.get(nombre) if self.activo else None
+
+    def resumen(self):
+        with self._lock:
+            histogramas = {}
+            for nombre, h in self._histogramas.items():
+                datos = dict(h, cubos=list(h["cubos"]))
+                datos["media_ms"] = h["total_ms"] / h["n"]
+                datos["p50_ms"] = self._percentil(h, 0.50)
+                datos["p95_ms"] = self._percentil(h, 0.95)
+                histogramas[nombre] = datos
+            return {"inicio": self.inicio, "fin": time.time(), "pid": os.getpid(),
+                    "limites_cubos_ms": list(self.CUBOS_MS),
+                    "contadores": dict(self._contadores),
+                    "histogramas": histogramas}
+
+    def _percentil(self, h, q):
+        # Límite superior del cubo donde cae el percentil (acotado al máximo)
+        objetivo = q * h["n"]
+        acumulado = 0
+        for i, cantidad in enumerate(h["cubos"]):
+            acumulado += cantidad
+            if acumulado >= objetivo:
+                limite = self.CUBOS_MS[i] if i < len(self.CUBOS_MS) else h["max_ms"]
+                return min(limite, h["max_ms"])
+        return h["max_ms"]
+
+    def guardar(self):
+        """Escribe el resumen de la sesión; se llama al salir"""
+        if not self.activo or (not self._histogramas and not self._contadores):
+            return None
+        try:
+            os.makedirs(self.destino, exist_ok=True)
+            nombre = time.strftime("metricas_%Y%m%d-%H%M%S", time.localtime(self.inicio))
+            ruta = os.path.join(self.destino, f"{nombre}_{os.getpid()}.json")
+            with open(ruta, "w", encoding="utf-8") as f:
+                json.dump(self.resumen(), f, indent=2, ensure_ascii=False)
+            return ruta
+        except OSError:
+            return None
+
+metrics = Metrics.desde_entorno()
+
+class ButtonFaceCache:
+    """Caras de botón redondeadas renderizadas una sola vez como PNG.
+
+    Cada cara depende solo de (ancho, alto, radio, color); todos los
+    botones con la misma geometría y color comparten la misma PhotoImage.
+    Las esquinas llevan alfa para que se vea el fondo del contenedor.
+    """
+    def __init__(self):
+        self._caras = {}
+
+    def obtener(self, widget, ancho, alto, radio, color):
+        # El color se normaliza con Tk para aceptar nombres ("lightblue")
+        rgb = tuple(c >> 8 for c in widget.winfo_rgb(color))
+        clave = (ancho, alto, radio, rgb)
+        cara = self._caras.get(clave)
+        if cara is None:
+            datos = self._png_redondeado(ancho, alto, radio, rgb)
+            cara = tk.PhotoImage(master=widget, data=base64.b64encode(datos), format="png")
+            self._caras[clave] = cara
+        return cara
+
+    def vaciar(self):
+        self._caras.clear()
+
+    @staticmethod
+    def _png_redondeado(ancho, alto, radio, rgb):
+        """Rectángulo redondeado RGBA con esquinas suavizadas, codificado en PNG"""
+        radio = max(0, min(radio, ancho // 2, alto // 2))
+        r, g, b = rgb
+        lleno = bytes((r, g, b, 255))
+        centro = lleno * (ancho - 2 * radio)
+        fila_llena = b"\x00" + lleno * ancho
+        
+        # Las filas de las esquinas solo dependen de la distancia al borde
+        filas_esquina = []
+        for y in range(radio):
+            dy = radio - 0.5 - y
+            izquierda = bytearray()
+            for x in range(radio):
+                dx = radio - 0.5 - x
+                cobertura = radio + 0.5 - math.hypot(dx, dy)
+                alfa = 255 if cobertura >= 1 else 0 if cobertura <= 0 else int(cobertura * 255)
+                izquierda += bytes((r, g, b, alfa))
+            derecha = b"".join(izquierda[i:i + 4] for i in range(len(izquierda) - 4, -1, -4))
+            filas_esquina.append(b"\x00" + bytes(izquierda) + centro + derecha)
+        
+        filas = filas_esquina + [fila_llena] * (alto - 2 * radio) + filas_esquina[::-1]
+        
+        def bloque(tipo, datos):
+            return (struct.pack(">I", len(datos)) + tipo + datos +
+                    struct.pack(">I", zlib.crc32(tipo + datos) & 0xFFFFFFFF))
+        
+        return (b"\x89PNG\r\n\x1a\n" +
+                bloque(b"IHDR", struct.pack(">IIBBBBB", ancho, alto, 8, 6, 0, 0, 0)) +
+                bloque(b"IDAT", zlib.compress(b"".join(filas))) +
+                bloque(b"IEND", b""))
+
+button_faces = ButtonFaceCache()
+
+class SemicuadradoButton(tk.Label):
+    """Botón redondeado: una Label con la cara cacheada y el texto encima.
+
+    Pulsar solo intercambia la imagen normal por la activa.
+    """
     def __init__(self, master=None, text="", bg="#3498DB", fg="white", 
                  active_bg="#2980B9", command=None, width=100, height=80,  # Reduced sizes
                  corner_radius=20, font=FUENTE_BOTON, **kwargs):
         self.width = width
         self.height = height
         self.corner_radius = corner_radius
-        tk.Canvas.__init__(self, master, width=width, height=height, 
-                          highlightthickness=0, bd=0, **kwargs)
         self.command = command
         self.bg = bg
         self.active_bg = active_bg
         self.fg = fg
         self.font = font
         
+        # El fondo de la Label es el del contenedor, visible en las esquinas
+        kwargs.setdefault("bg", master.cget("bg") if master is not None else COLOR_FONDO)
+        tk.Label.__init__(self, master, text=text, fg=fg, font=font, justify=tk.CENTER,
+                          compound=tk.CENTER, bd=0, padx=0, pady=0, highlightthickness=0,
+                          cursor="hand2", **kwargs)
+        self._cara = button_faces.obtener(self, width, height, corner_radius, bg)
+        self._cara_activa = button_faces.obtener(self, width, height, corner_radius, active_bg)
+        # Con imagen, width/height de la Label se miden en píxeles
+        self.configure(image=self._cara, width=width, height=height)
+        
         self.bind("<Button-1>", self._on_press)
         self.bind("<ButtonRelease-1>", self._on_release)
-        self.bind("<Enter>", self._on_enter)
-        self.bind("<Leave>", self._on_leave)
-        
-        self.draw_button(text)
         
     def draw_button(self, text):
-        self.delete("all")
-        self.create_rounded_rectangle(0, 0, self.width, self.height, 
-                                    radius=self.corner_radius, 
-                                    fill=self.bg, outline=self.bg)
-        self.create_text(self.width//2, self.height//2, text=text, 
-                        fill=self.fg, font=self.font, justify=tk.CENTER)
-    
-    def create_rounded_rectangle(self, x1, y1, x2, y2, radius=25, **kwargs):
-        points = [x1+radius, y1,
-                 x2-radius, y1,
-                 x2, y1,
-                 x2, y1+radius,
-                 x2, y2-radius,
-                 x2, y2,
-                 x2-radius, y2,
-                 x1+radius, y2,
-                 x1, y2,
-                 x1, y2-radius,
-                 x1, y1+radius,
-                 x1, y1]
-        return self.create_polygon(points, **kwargs, smooth=True)
+        self.configure(text=text)
         
     def _on_press(self, event):
-        self.itemconfig(1, fill=self.active_bg)
+        self.configure(image=self._cara_activa)
         
     def _on_release(self, event):
-        self.itemconfig(1, fill=self.bg)
+        self.configure(image=self._cara)
         if self.command:
-            self.command()
-    
-    def _on_enter(self, event):
-        self.config(cursor="hand2")
-    
-    def _on_leave(self, event):
-        self.config(cursor="")
+            # El sonido que se inicie dentro del comando mide desde este clic
+            metrics.marcar("clic")
+            try:
+                self.command()
+            finally:
+                metrics.desmarcar("clic")
+
+class ScreenManager:
+    """Construye cada pantalla estática una sola vez y alterna entre ellas.
+
+    Las pantallas estáticas se conservan ocultas con pack_forget; las
+    dinámicas (preguntas, juegos, resultados) comparten un contenedor que
+    se vacía y se vuelve a llenar cada vez que se muestran.
+    """
+    def __init__(self, root, nombre="", bg=COLOR_FONDO):
+        self.root = root
+        self.nombre = nombre
+        self.bg = bg
+        self._pantallas = {}
+        self._dinamica = None
+        self.actual = None
+
+    def mostrar(self, nombre, construir):
+        """Muestra la pantalla `nombre`; construir(pantalla) solo se llama la primera vez"""
+        pantalla = self._pantallas.get(nombre)
+        if pantalla is None or not pantalla.winfo_exists():
+            with metrics.span(f"pantalla.{self.nombre}.{nombre}.construir"):
+                pantalla = tk.Frame(self.root, bg=self.bg)
+                construir(pantalla)
+            self._pantallas[nombre] = pantalla
+        else:
+            metrics.contar("pantalla.reutilizada")
+        with metrics.span(f"pantalla.{self.nombre}.{nombre}.mostrar"):
+            self._cambiar_a(pantalla)
+        return pantalla
+
+    def mostrar_dinamica(self, bg=None):
+        """Vacía el contenedor dinámico, lo muestra y lo devuelve para llenarlo"""
+        if self._dinamica is None or not self._dinamica.winfo_exists():
+            self._dinamica = tk.Frame(self.root)
+        else:
+            self._vaciar_dinamica()
+        self._dinamica.configure(bg=bg or self.bg)
+        self._cambiar_a(self._dinamica)
+        return self._dinamica
+
+    def _vaciar_dinamica(self):
+        for widget in self._dinamica.winfo_children():
+            widget.destroy()
+
+    def _cambiar_a(self, pantalla):
+        if self.actual is pantalla:
+            return
+        if self.actual is not None and self.actual.winfo_exists():
+            self.actual.pack_forget()
+            if self.actual is self._dinamica:
+                # Lo dinámico no se conserva: así se detienen sus after()
+                self._vaciar_dinamica()
+        pantalla.pack(fill=tk.BOTH, expand=True)
+        self.actual = pantalla
 
 class AudioPlayer:
-    @staticmethod
-    def reproducir(audio_data, sample_rate=44100, sample_width=2, channels=1):
+    """Motor de reproducción no bloqueante con un hilo de audio dedicado.
+
+    Todas las voces activas se mezclan en bloques float32 y se escriben en un
+    único stream de salida, sin importar cuántas capas suenen a la vez.
+    """
+    FRAMES_POR_BLOQUE = 1024
+    SAMPLE_RATE = 44100
+    CHANNELS = 2
+    # Fundido al reemplazar o detener un sonido, para evitar chasquidos
+    FADE_CORTE = 0.015
+    # Nivel a partir del cual actúa el limitador: solo una suma que saturaría,
+    # de modo que una única fuente a escala completa pasa intacta
+    UMBRAL_LIMITADOR = 1.0
+    LIBERACION_LIMITADOR = 0.05
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._hay_trabajo = threading.Condition(self._lock)
+        self._voces = []
+        self._principal = None
+        self._cerrado = False
+        self._hilo = None
+        self._root = None
+        self._callbacks = queue.Queue()
+        self._ganancia_limitador = 1.0
+
+    def vincular_tk(self, root):
+        """Entrega los callbacks de fin de reproducción en el hilo de Tk"""
+        self._root = root
+        self._despachar_callbacks()
+
+    def reproducir(self, audio_data, sample_rate=44100, sample_width=2, channels=1,
+                   on_complete=None):
+        """Reproduce en segundo plano, reemplazando el sonido en curso.
+
+        on_complete(completada) se llama al terminar; completada es False si
+        la reproducción fue interrumpida por detener() o por otro sonido.
+        """
+        bloque = self.FRAMES_POR_BLOQUE * sample_width * channels
+        return self.reproducir_bloques(_partir_en_bloques(audio_data, bloque),
+                                       sample_rate, sample_width, channels,
+                                       on_complete)
+
+    def reproducir_bloques(self, bloques, sample_rate=44100, sample_width=2, channels=1,
+                           on_complete=None):
+        """Reproduce un iterable de bloques de bytes PCM a medida que se producen.
+
+        El iterable se consume en el hilo de audio, de modo que la lectura de
+        disco o la síntesis ocurren fuera del hilo de Tk. Reemplaza al sonido
+        principal en curso pero no a las capas añadidas con agregar_capa().
+        """
+        voz = Voz(bloques, sample_rate, sample_width, channels,
+                  on_complete=on_complete)
+        with self._lock:
+            if self._principal is not None:
+                self._principal.detener(self.FADE_CORTE)
+            if not self._agregar(voz):
+                return None
+            self._principal = voz
+        return voz
+
+    def agregar_capa(self, bloques, sample_rate=44100, sample_width=2, channels=1,
+                     ganancia=1.0, fade_in=0.0, on_complete=None):
+        """Suma una fuente a la mezcla sin interrumpir a las demás"""
+        voz = Voz(bloques, sample_rate, sample_width, channels, ganancia=ganancia,
+                  fade_in=fade_in, on_complete=on_complete)
+        with self._lock:
+            if not self._agregar(voz):
+                return None
+        return voz
+
+    def detener(self, fade=None):
+        """Interrumpe el sonido principal y todas las capas"""
+        fade = self.FADE_CORTE if fade is None else fade
+        with self._lock:
+            for voz in self._voces:
+                voz.detener(fade)
+
+    def cerrar(self):
+        """Detiene el hilo de audio; se llama antes de liberar PyAudio"""
+        with self._hay_trabajo:
+            self._cerrado = True
+            for voz in self._voces:
+                voz.detener(0)
+            self._hay_trabajo.notify()
+            hilo = self._hilo
+        if hilo is not None and hilo is not threading.current_thread():
+            hilo.join(timeout=1.0)
+
+    def _agregar(self, voz):
+        # Debe llamarse con self._lock tomado
+        if self._cerrado or resource_manager.get_pyaudio() is None:
+            return False
+        self._voces.append(voz)
+        self._hay_trabajo.notify()
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._bucle, name="AudioPlayer",
+                                          daemon=True)
+            self._hilo.start()
+        return True
+
+    def _bucle(self):
+        formato = (self.SAMPLE_RATE, 2, self.CHANNELS)
+        while True:
+            with self._hay_trabajo:
+                while not self._voces and not self._cerrado:
+                    self._hay_trabajo.wait()
+                if self._cerrado:
+                    self._finalizar_voces(list(self._voces))
+                    self._voces.clear()
+                    return
+
+            stream = None
+            try:
+                stream = resource_manager.get_output_stream(*formato)
+                if stream is None:
+                    raise RuntimeError("PyAudio no está disponible")
+                self._ganancia_limitador = 1.0
+                while True:
+                    with self._lock:
+                        voces = list(self._voces)
+                    if not voces or self._cerrado:
+                        break
+                    stream.write(self._mezclar(voces))
+                    if metrics.activo:
+                        self._medir_inicio(voces)
+            except Exception as e:
+                if stream is not None:
+                    resource_manager.discard_output_stream(stream)
+                    stream = None
+                with self._lock:
+                    fallidas = list(self._voces)
+                    self._voces.clear()
+                for voz in fallidas:
+                    voz.detener(0)
+                self._finalizar_voces(fallidas)
+                self._notificar(messagebox.showerror, "Error de Audio",
+                                f"No se pudo reproducir: {str(e)}")
+            finally:
+                if stream is not None:
+                    resource_manager.release_output_stream(stream, *formato)
+
+    def _medir_inicio(self, voces):
+        # Primer bloque escrito de cada voz iniciada por un clic
+        for voz in voces:
+            if voz.t_solicitud is not None:
+                metrics.registrar_desde("audio.clic_a_primer_bloque", voz.t_solicitud)
+                voz.t_solicitud = None
+
+    def _mezclar(self, voces):
+        """Suma un bloque de cada voz y devuelve el PCM int16 estéreo resultante"""
+        n = self.FRAMES_POR_BLOQUE
+        mezcla = np.zeros((n, self.CHANNELS), dtype=np.float32)
+        terminadas = []
+        for voz in voces:
+            try:
+                muestras = voz.leer(n, self.SAMPLE_RATE)
+            except Exception as e:
+                voz.detener(0)
+                muestras = None
+                self._notificar(messagebox.showerror, "Error de Audio",
+                                f"No se pudo reproducir: {str(e)}")
+            if muestras is not None:
+                mezcla[:len(muestras)] += muestras
+            if voz.terminada:
+                terminadas.append(voz)
+
+        if terminadas:
+            with self._lock:
+                for voz in terminadas:
+                    self._voces.remove(voz)
+                    if self._principal is voz:
+                        self._principal = None
+            self._finalizar_voces(terminadas)
+        return self._limitar(mezcla).tobytes()
+
+    def _limitar(self, mezcla):
+        # Limitador de pico: ataque inmediato (la rampa arranca ya en la ganancia
+        # reducida) y liberación gradual a lo largo de varios bloques
+        pico = float(np.max(np.abs(mezcla))) if len(mezcla) else 0.0
+        objetivo = min(1.0, self.UMBRAL_LIMITADOR / pico) if pico > 0 else 1.0
+        anterior = self._ganancia_limitador
+        if objetivo < anterior:
+            actual = objetivo
+        else:
+            actual = anterior + (objetivo - anterior) * self.LIBERACION_LIMITADOR
+        self._ganancia_limitador = actual
+        if anterior != 1.0 or actual != 1.0:
+            rampa = np.linspace(min(anterior, objetivo), actual, len(mezcla),
+                                dtype=np.float32)
+            mezcla *= rampa[:, None]
+        # Misma escala que _decodificar_pcm: una fuente int16 sale sin cambios
+        mezcla *= 32768
+        np.clip(mezcla, -32768, 32767, out=mezcla)
+        return mezcla.astype(np.int16)
+
+    def _finalizar_voces(self, voces):
+        for voz in voces:
+            voz.cerrar_fuente()
+            self._notificar(voz.on_complete, not voz.detenida.is_set())
+
+    def _notificar(self, callback, *args):
+        if callback is None:
+            return
+        if self._root is None:
+            callback(*args)
+        else:
+            self._callbacks.put((callback, args))
+
+    def _despachar_callbacks(self):
+        while True:
+            try:
+                callback, args = self._callbacks.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception:
+                self._root.report_callback_exception(*sys.exc_info())
+        try:
+            self._root.after(30, self._despachar_callbacks)
+        except tk.TclError:
+            # La ventana raíz ya fue destruida
+            self._root = None
+
+class Voz:
+    """Una fuente dentro de la mezcla del AudioPlayer, con ganancia y fundidos propios"""
+    def __init__(self, bloques, sample_rate, sample_width, channels,
+                 ganancia=1.0, fade_in=0.0, on_complete=None):
+        self.bloques = iter(bloques)
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.channels = channels
+        self.on_complete = on_complete
+        self.detenida = threading.Event()
+        self.terminada = False
+        self.ganancia = ganancia
+        # Envolvente de fundido: valor actual, destino y avance por frame de salida
+        self._env_lock = threading.Lock()
+        self._env = 0.0 if fade_in > 0 else 1.0
+        self._env_objetivo = 1.0
+        self._env_paso = 1.0 / (fade_in * AudioPlayer.SAMPLE_RATE) if fade_in > 0 else 0.0
+        self._resto = b""
+        self._buffer = np.zeros((0, 2), dtype=np.float32)
+        self._pos = 0.0
+        self._agotada = False
+        # Instante del clic que originó la voz, para medir la latencia
+        self.t_solicitud = metrics.marca("clic")
+
+    def detener(self, fade=0.0):
+        """Detiene la voz con un fundido de salida de `fade` segundos"""
+        self.detenida.set()
+        with self._env_lock:
+            if fade > 0 and self._env > 0:
+                self._env_objetivo = 0.0
+                self._env_paso = -self._env / (fade * AudioPlayer.SAMPLE_RATE)
+            else:
+                self._env = self._env_objetivo = 0.0
+                self.terminada = True
+
+    def cerrar_fuente(self):
+        # Cerrar el generador libera el archivo que estuviera leyendo
+        cerrar = getattr(self.bloques, "close", None)
+        if cerrar is not None:
+            cerrar()
+
+    def leer(self, frames, sample_rate_salida):
+        """Devuelve hasta `frames` frames estéreo float32 ya remuestreados"""
+        if self.terminada:
+            return None
+        paso = self.sample_rate / sample_rate_salida
+        # Índices fuente (fraccionarios) de cada frame de salida
+        necesarios = int(self._pos + paso * (frames - 1)) + 2
+        while len(self._buffer) < necesarios and not self._agotada:
+            self._decodificar_siguiente()
+        disponibles = len(self._buffer)
+        if self._agotada:
+            frames = min(frames, max(0, math.floor((disponibles - 1 - self._pos) / paso) + 1))
+        if frames <= 0:
+            self.terminada = True
+            return None
+
+        indices = self._pos + paso * np.arange(frames)
+        base = indices.astype(np.intp)
+        frac = (indices - base).astype(np.float32)[:, None]
+        siguiente = np.minimum(base + 1, disponibles - 1)
+        muestras = self._buffer[base] * (1 - frac) + self._buffer[siguiente] * frac
+
+        # Descartar lo ya consumido, conservando la muestra necesaria para interpolar
+        self._pos += paso * frames
+        consumidos = int(self._pos)
+        self._buffer = self._buffer[consumidos:]
+        self._pos -= consumidos
+
+        muestras *= self._envolvente(frames)
+        if self._agotada and len(self._buffer) <= 1:
+            self.terminada = True
+        return muestras
+
+    def _envolvente(self, frames):
+        # Ganancia fija de la voz por los fundidos de entrada/salida
+        ganancia = np.full(frames, self.ganancia, dtype=np.float32)
+        with self._env_lock:
+            if self._env_paso != 0.0:
+                env = self._env + self._env_paso * np.arange(1, frames + 1, dtype=np.float32)
+                if self._env_paso > 0:
+                    np.minimum(env, self._env_objetivo, out=env)
+                else:
+                    np.maximum(env, self._env_objetivo, out=env)
+                self._env = float(env[-1])
+                if self._env == self._env_objetivo:
+                    self._env_paso = 0.0
+                    if self._env_objetivo == 0.0:
+                        self.terminada = True
+                ganancia *= env
+            elif self._env != 1.0:
+                ganancia *= self._env
+        return ganancia[:, None]
+
+    def _decodificar_siguiente(self):
         try:
-            p = resource_manager.get_pyaudio()
-            if p is None:
+            datos = next(self.bloques)
+        except StopIteration:
+            self._agotada = True
+            return
+        tamano_frame = self.sample_width * self.channels
+        datos = self._resto + bytes(datos) if self._resto else datos
+        utiles = len(datos) - len(datos) % tamano_frame
+        self._resto = bytes(datos[utiles:])
+        if utiles == 0:
+            return
+        frames = _decodificar_pcm(datos[:utiles], self.sample_width, self.channels)
+        self._buffer = np.concatenate((self._buffer, frames))
+
+def _decodificar_pcm(datos, sample_width, channels):
+    """Convierte PCM entero intercalado a un array float32 estéreo (frames, 2)"""
+    if sample_width == 1:
+        signal = (np.frombuffer(datos, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 2:
+        signal = np.frombuffer(datos, dtype='<i2').astype(np.float32) / 32768
+    elif sample_width == 3:
+        crudo = np.frombuffer(datos, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        enteros = crudo[:, 0] | (crudo[:, 1] << 8) | (crudo[:, 2] << 16)
+        enteros = np.where(enteros >= 1 << 23, enteros - (1 << 24), enteros)
+        signal = enteros.astype(np.float32) / (1 << 23)
+    elif sample_width == 4:
+        signal = np.frombuffer(datos, dtype='<i4').astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"Ancho de muestra no soportado: {sample_width}")
+    signal = signal.reshape(-1, channels)
+    if channels == 1:
+        return np.repeat(signal, 2, axis=1)
+    return signal[:, :2]
+
+def _partir_en_bloques(audio_data, tamano_bloque):
+    datos = memoryview(audio_data).cast("B")
+    for inicio in range(0, len(datos), tamano_bloque):
+        yield datos[inicio:inicio + tamano_bloque]
+
+class WavMapeado:
+    """Lector WAV que expone el chunk de datos como np.memmap, sin copias.
+
+    Los bloques son vistas sobre la caché de páginas del sistema, así que
+    varias reproducciones del mismo archivo comparten la memoria física.
+    """
+    FORMATO_PCM = 1
+    FORMATO_EXTENSIBLE = 0xFFFE
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        offset, tamano = self._leer_cabecera(ruta)
+        self.tamano_frame = self.sample_width * self.channels
+        self.nframes = tamano // self.tamano_frame
+        self.nbytes = self.nframes * self.tamano_frame
+        if self.nbytes:
+            self.datos = np.memmap(ruta, dtype=np.uint8, mode='r', offset=offset,
+                                   shape=(self.nbytes,))
+        else:
+            self.datos = np.zeros(0, dtype=np.uint8)
+
+    def _leer_cabecera(self, ruta):
+        with open(ruta, 'rb') as f:
+            riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+            if riff != b'RIFF' or wave_id != b'WAVE':
+                raise ValueError(f"{os.path.basename(ruta)} no es un archivo WAV")
+            tamano_archivo = os.fstat(f.fileno()).st_size
+            formato = None
+            while True:
+                cabecera = f.read(8)
+                if len(cabecera) < 8:
+                    raise ValueError(f"{os.path.basename(ruta)} no tiene chunk de datos")
+                chunk_id, chunk_size = struct.unpack('<4sI', cabecera)
+                if chunk_id == b'fmt ':
+                    formato = f.read(chunk_size)
+                    self._interpretar_formato(formato)
+                    if chunk_size % 2:
+                        f.seek(1, os.SEEK_CUR)
+                elif chunk_id == b'data':
+                    if formato is None:
+                        raise ValueError(f"{os.path.basename(ruta)}: falta el chunk 'fmt '")
+                    offset = f.tell()
+                    # Algunos grabadores dejan el tamaño en 0 o 0xFFFFFFFF
+                    return offset, min(chunk_size or tamano_archivo, tamano_archivo - offset)
+                else:
+                    # JUNK, LIST, fact... se saltan respetando el relleno a tamaño par
+                    f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+    def _interpretar_formato(self, formato):
+        tag, channels, sample_rate, _, _, bits = struct.unpack('<HHIIHH', formato[:16])
+        if tag == self.FORMATO_EXTENSIBLE and len(formato) >= 26:
+            tag = struct.unpack('<H', formato[24:26])[0]
+        if tag != self.FORMATO_PCM:
+            raise ValueError(f"Formato WAV no soportado: {tag}")
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.sample_width = (bits + 7) // 8
+
+    def bloques(self, frames_por_bloque=AudioPlayer.FRAMES_POR_BLOQUE, bucle=False):
+        """Vistas consecutivas de `frames_por_bloque` frames, sin copiar datos"""
+        tamano = frames_por_bloque * self.tamano_frame
+        while True:
+            for inicio in range(0, self.nbytes, tamano):
+                yield self.datos[inicio:inicio + tamano]
+            if not bucle or self.nbytes == 0:
+                break
+
+    def precargar_paginas(self):
+        """Lee un byte por página para traer el archivo a la caché del sistema"""
+        if self.nbytes:
+            int(self.datos[::mmap.PAGESIZE].sum())
+
+class AudioCache:
+    """Caché LRU de WAV mapeados en memoria, por ruta y mtime, con presupuesto de bytes"""
+    def __init__(self, max_bytes=AUDIO_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes_usados = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entradas = OrderedDict()  # (ruta, mtime_ns) -> WavMapeado
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _clave(ruta):
+        return (ruta, os.stat(ruta).st_mtime_ns)
+
+    def obtener(self, ruta):
+        """Devuelve el audio en caché o None si no está o el archivo cambió"""
+        clave = self._clave(ruta)
+        with self._lock:
+            audio = self._entradas.get(clave)
+            if audio is None:
+                self.misses += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.hits += 1
+            return audio
+
+    def cargar(self, ruta):
+        """Devuelve el audio desde la caché, mapeándolo si hace falta.
+
+        Los archivos que superan el presupuesto se mapean igual, pero no se
+        conservan en la caché.
+        """
+        audio = self.obtener(ruta)
+        if audio is not None:
+            return audio
+        clave = self._clave(ruta)
+        audio = WavMapeado(ruta)
+        self._guardar(clave, audio)
+        return audio
+
+    def precargar(self, rutas):
+        """Mapea los archivos y trae sus páginas en un hilo aparte"""
+        def tarea():
+            for ruta in rutas:
+                try:
+                    self.cargar(ruta).precargar_paginas()
+                except Exception:
+                    pass
+        threading.Thread(target=tarea, name="AudioCache-precarga", daemon=True).start()
+
+    def configurar(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._expulsar_hasta(max_bytes)
+
+    def vaciar(self):
+        with self._lock:
+            self._entradas.clear()
+            self.bytes_usados = 0
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "bytes": self.bytes_usados,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _guardar(self, clave, audio):
+        tamano = audio.nbytes
+        with self._lock:
+            if tamano > self.max_bytes or clave in self._entradas:
                 return
-                
-            stream = p.open(
-                format=p.get_format_from_width(sample_width),
-                channels=channels,
-                rate=sample_rate,
-                output=True
-            )
-            stream.write(audio_data)
-            stream.stop_stream()
-            stream.close()
+            # Descartar versiones anteriores del mismo archivo
+            ruta = clave[0]
+            for vieja in [c for c in self._entradas if c[0] == ruta]:
+                self.bytes_usados -= self._entradas.pop(vieja).nbytes
+            self._expulsar_hasta(self.max_bytes - tamano)
+            self._entradas[clave] = audio
+            self.bytes_usados += tamano
+
+    def _expulsar_hasta(self, limite):
+        # Debe llamarse con self._lock tomado
+        while self._entradas and self.bytes_usados > limite:
+            _, audio = self._entradas.popitem(last=False)
+            self.bytes_usados -= audio.nbytes
+            self.evictions += 1
+
+class NoiseSynth:
+    """Sintetizador de ruido por bloques que conserva el estado entre bloques.
+
+    El filtro rosa (IIR de -3 dB/octava) y el integrador con fugas del ruido
+    marrón continúan de un bloque al siguiente, así que la salida puede
+    durar lo que se quiera con memoria constante. El nivel se fija con
+    ganancias calculadas de antemano, sin pasada de normalización global.
+    """
+    # Nivel RMS por color; reproduce la sonoridad del generar_ruido original
+    NIVEL_RMS = {"blanco": 0.29, "marrón": 0.21, "rosa": 0.11}
+    PINK_B = (0.049922035, -0.095993537, 0.050612699, -0.004408786)
+    PINK_A = (1.0, -2.494956002, 2.017265875, -0.522189400)
+    # Ganancia RMS del filtro rosa ante ruido blanco de varianza 1
+    PINK_RMS = 0.0862
+    # Polo del integrador marrón: corte cercano a 35 Hz a 44.1 kHz
+    BROWN_LEAK = 0.995
+
+    def __init__(self, tipo, sample_rate=44100, frames_por_bloque=AudioPlayer.FRAMES_POR_BLOQUE,
+                 seed=None):
+        if tipo not in ("blanco", "rosa", "marrón"):
+            raise ValueError(f"Tipo de ruido desconocido: {tipo}")
+        self.tipo = tipo
+        self.sample_rate = sample_rate
+        self.frames_por_bloque = frames_por_bloque
+        self.rng = np.random.default_rng(seed)
+        # Estado del filtro rosa: últimas 3 entradas y últimas 3 salidas
+        self._x_prev = np.zeros(3)
+        self._y_prev = (0.0, 0.0, 0.0)
+        # El integrador arranca en su régimen estacionario para evitar un transitorio
+        self._integrador = (self.rng.standard_normal()
+                            / math.sqrt(1 - self.BROWN_LEAK ** 2))
+        self._potencias = None
+
+    def siguiente_bloque(self, frames=None):
+        """Devuelve el siguiente bloque como float64 con el RMS de su color"""
+        frames = frames or self.frames_por_bloque
+        if frames > self.frames_por_bloque:
+            # La forma cerrada del integrador desborda con bloques muy largos
+            # (0.995 ** -n pasa de float64 cerca de 141k frames)
+            return self.generar(frames)
+        nivel = self.NIVEL_RMS[self.tipo]
+        if self.tipo == "blanco":
+            # Uniforme en [-A, A] tiene RMS A/sqrt(3)
+            amplitud = nivel * math.sqrt(3)
+            return self.rng.uniform(-amplitud, amplitud, frames)
+        white = self.rng.standard_normal(frames)
+        if self.tipo == "rosa":
+            signal = self._filtrar_rosa(white)
+            escala = nivel / self.PINK_RMS
+        else:
+            signal = self._integrar(white)
+            escala = nivel * math.sqrt(1 - self.BROWN_LEAK ** 2)
+        signal *= escala
+        return signal
+
+    def generar(self, samples):
+        """Concatena bloques hasta reunir la cantidad de muestras pedida"""
+        partes = []
+        restantes = samples
+        while restantes > 0:
+            n = min(self.frames_por_bloque, restantes)
+            partes.append(self.siguiente_bloque(n))
+            restantes -= n
+        return np.concatenate(partes) if partes else np.zeros(0)
+
+    def bloques_pcm(self, duracion=None):
+        """Bloques PCM int16 mono; sin duración el ruido no termina nunca"""
+        restantes = None if duracion is None else int(duracion * self.sample_rate)
+        while restantes is None or restantes > 0:
+            n = self.frames_por_bloque if restantes is None else min(self.frames_por_bloque, restantes)
+            signal = np.clip(self.siguiente_bloque(n), -1.0, 1.0)
+            yield (signal * 32767).astype(np.int16).tobytes()
+            if restantes is not None:
+                restantes -= n
+
+    def _filtrar_rosa(self, white):
+        # Parte FIR vectorizada, con las entradas del bloque anterior como historia
+        b = np.array(self.PINK_B)
+        extendida = np.concatenate((self._x_prev, white))
+        v = np.convolve(extendida, b, mode='valid')
+        self._x_prev = extendida[-3:]
+        # Parte recursiva (polos) muestra a muestra, con su estado continuo
+        _, a1, a2, a3 = self.PINK_A
+        y1, y2, y3 = self._y_prev
+        salida = []
+        for vi in v.tolist():
+            y = vi - a1 * y1 - a2 * y2 - a3 * y3
+            salida.append(y)
+            y3, y2, y1 = y2, y1, y
+        self._y_prev = (y1, y2, y3)
+        return np.array(salida)
+
+    def _integrar(self, white):
+        # y[n] = p*y[n-1] + x[n] resuelto en forma cerrada para todo el bloque:
+        # y[n] = p^n * (p*y[-1] + sum_k x[k] / p^k)
+        n = len(white)
+        if self._potencias is None or len(self._potencias) != n:
+            self._potencias = self.BROWN_LEAK ** np.arange(n)
+        signal = self._potencias * (self.BROWN_LEAK * self._integrador
+                                    + np.cumsum(white / self._potencias))
+        self._integrador = signal[-1]
+        return signal
+
+def sintetizar_ruido(tipo, samples):
+    """Genera ruido blanco, rosa o marrón con el nivel de NoiseSynth"""
+    return NoiseSynth(tipo).generar(samples)
+
+class NoiseBank:
+    """Banco de ruidos precalculados que se repiten sin costura audible.
+
+    Cada color se genera una sola vez (en segundo plano o al pedirlo) y se
+    guarda en la carpeta de caché para reutilizarlo en sesiones siguientes.
+    """
+    VERSION = 3
+    DURACION = 5
+    CROSSFADE = 0.1
+    ARCHIVOS = {"blanco": "blanco", "rosa": "rosa", "marrón": "marron"}
+
+    def __init__(self, sample_rate=44100, carpeta=None):
+        self.sample_rate = sample_rate
+        # Carpeta de los bucles en disco; por omisión, la caché de la aplicación
+        self.carpeta = carpeta or file_manager.cache_dir
+        self._buffers = {}
+        self._errores = {}
+        self._locks = {tipo: threading.Lock() for tipo in self.ARCHIVOS}
+
+    def obtener(self, tipo):
+        """Devuelve el buffer PCM int16 mono del color, generándolo si hace falta"""
+        buffer = self._buffers.get(tipo)
+        if buffer is not None:
+            return buffer
+        with self._locks[tipo]:
+            buffer = self._buffers.get(tipo)
+            if buffer is None:
+                buffer = self._cargar_de_disco(tipo)
+                if buffer is None:
+                    buffer = self._construir(tipo)
+                    self._guardar_en_disco(tipo, buffer)
+                self._buffers[tipo] = buffer
+        return buffer
+
+    def precalentar(self):
+        """Prepara todos los colores en un hilo aparte"""
+        def tarea():
+            for tipo in self.ARCHIVOS:
+                self._obtener_registrando(tipo)
+        threading.Thread(target=tarea, name="NoiseBank-precalentar", daemon=True).start()
+
+    def preparar(self, tipo):
+        """Genera un color en un hilo aparte si todavía no está en memoria"""
+        if tipo not in self.ARCHIVOS:
+            raise ValueError(f"Tipo de ruido desconocido: {tipo}")
+        if tipo in self._buffers:
+            return
+        self._errores.pop(tipo, None)
+        threading.Thread(target=self._obtener_registrando, args=(tipo,),
+                         name="NoiseBank-preparar", daemon=True).start()
+
+    def _obtener_registrando(self, tipo):
+        # El fallo queda guardado para quien esté esperando el buffer
+        try:
+            self.obtener(tipo)
+            self._errores.pop(tipo, None)
         except Exception as e:
-            messagebox.showerror("Error de Audio", f"No se pudo reproducir: {str(e)}")
+            self._errores[tipo] = e
+
+    def vaciar(self, disco=False):
+        """Olvida los buffers en memoria y, si se pide, también los de la caché"""
+        for tipo in self.ARCHIVOS:
+            with self._locks[tipo]:
+                self._buffers.pop(tipo, None)
+                if disco:
+                    try:
+                        os.remove(self._ruta(tipo))
+                    except OSError:
+                        pass
+
+    def bloques_en_bucle(self, tipo, duracion, frames_por_bloque=AudioPlayer.FRAMES_POR_BLOQUE):
+        """Recorre el buffer en bucle durante la duración pedida.
+
+        Si el color aún no está listo se genera en otro hilo, ni en el de Tk
+        ni en el de audio; mientras tanto se entrega silencio, que no
+        descuenta de la duración.
+        """
+        self.preparar(tipo)
+        return self._recorrer(tipo, duracion, frames_por_bloque)
+
+    def _recorrer(self, tipo, duracion, frames_por_bloque):
+        silencio = bytes(frames_por_bloque * 2)
+        while tipo not in self._buffers:
+            error = self._errores.pop(tipo, None)
+            if error is not None:
+                raise error
+            yield silencio
+        buffer = memoryview(self._buffers[tipo])
+        restantes = int(duracion * self.sample_rate) * 2
+        tamano_bloque = frames_por_bloque * 2
+        pos = 0
+        while restantes > 0:
+            n = min(tamano_bloque, restantes, len(buffer) - pos)
+            yield buffer[pos:pos + n]
+            restantes -= n
+            pos = (pos + n) % len(buffer)
+
+    def _construir(self, tipo):
+        n = int(self.DURACION * self.sample_rate)
+        f = int(self.CROSSFADE * self.sample_rate)
+        signal = sintetizar_ruido(tipo, n + f)
+        # Fundir el final sobrante con el inicio: al volver a la muestra 0
+        # el bucle continúa justo donde terminaría la muestra n-1
+        t = (np.arange(f) + 0.5) / f * (np.pi / 2)
+        signal[:f] = signal[:f] * np.sin(t) + signal[n:n + f] * np.cos(t)
+        signal = np.clip(signal[:n], -1.0, 1.0)
+        return (signal * 32767).astype(np.int16).tobytes()
+
+    def _nombre_archivo(self, tipo):
+        return f"ruido_{self.ARCHIVOS[tipo]}_v{self.VERSION}_{self.sample_rate}.pcm"
+
+    def _ruta(self, tipo):
+        return os.path.join(self.carpeta, self._nombre_archivo(tipo))
+
+    def _cargar_de_disco(self, tipo):
+        try:
+            with open(self._ruta(tipo), 'rb') as f:
+                buffer = f.read()
+        except OSError:
+            return None
+        if len(buffer) != int(self.DURACION * self.sample_rate) * 2:
+            return None
+        return buffer
+
+    def _guardar_en_disco(self, tipo, buffer):
+        try:
+            file_manager.write_cache_file(self._nombre_archivo(tipo), buffer, self.carpeta)
+        except OSError:
+            pass
+
+class ImageCache:
+    """Caché en disco de imágenes ya escaladas, en píxeles RGB sin comprimir.
+
+    Cada entrada se identifica por ruta de origen, tamaño y filtro de escalado;
+    la cabecera guarda el mtime del origen y, si no coincide, la entrada se
+    reconstruye. Cargar una entrada es una sola lectura del archivo.
+    """
+    MAGIA = b"RBXIMG1\0"
+    CABECERA = struct.Struct("<8sqII")
+
+    def _nombre_archivo(self, ruta, tamano, filtro):
+        clave = f"{os.path.abspath(ruta)}|{tamano[0]}x{tamano[1]}|{filtro}"
+        return "img_" + hashlib.sha1(clave.encode("utf-8")).hexdigest()[:20] + ".rgb"
+
+    def obtener(self, ruta, tamano, filtro):
+        """Devuelve la superficie en caché o None si falta o está desactualizada"""
+        try:
+            mtime = os.stat(ruta).st_mtime_ns
+            with open(file_manager.get_cache_path(self._nombre_archivo(ruta, tamano, filtro)), 'rb') as f:
+                datos = f.read()
+        except OSError:
+            return None
+        if len(datos) < self.CABECERA.size:
+            return None
+        magia, mtime_origen, ancho, alto = self.CABECERA.unpack_from(datos)
+        pixeles = memoryview(datos)[self.CABECERA.size:]
+        if (magia != self.MAGIA or mtime_origen != mtime or (ancho, alto) != tuple(tamano)
+                or len(pixeles) != ancho * alto * 3):
+            return None
+        return pygame.image.frombuffer(pixeles, (ancho, alto), "RGB")
+
+    def guardar(self, ruta, tamano, filtro, superficie):
+        try:
+            mtime = os.stat(ruta).st_mtime_ns
+            convertir = getattr(pygame.image, "tobytes", None) or pygame.image.tostring
+            cabecera = self.CABECERA.pack(self.MAGIA, mtime, tamano[0], tamano[1])
+            file_manager.write_cache_file(self._nombre_archivo(ruta, tamano, filtro),
+                                          cabecera + convertir(superficie, "RGB"))
+        except (OSError, pygame.error):
+            pass
+
+class ImageLoader:
+    """Decodifica y escala imágenes en un pool de hilos"""
+    def __init__(self, max_workers=2):
+        self.max_workers = max_workers
+        self._pool = None
+
+    def cargar(self, archivos, tamano, colores_respaldo):
+        """Encola la carga de cada archivo y devuelve un Future por imagen.
+
+        Si un archivo falta o no se puede leer, su Future entrega una
+        superficie del color de respaldo correspondiente.
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="ImageLoader")
+        return [self._pool.submit(self._cargar_una, archivo, tamano,
+                                  colores_respaldo[i % len(colores_respaldo)])
+                for i, archivo in enumerate(archivos)]
+
+    @staticmethod
+    def _cargar_una(archivo, tamano, color):
+        try:
+            if file_manager.image_exists(archivo):
+                ruta = file_manager.get_image_path(archivo)
+                with metrics.span("visor.imagen.cargar"):
+                    img = image_cache.obtener(ruta, tamano, "smoothscale")
+                    if img is None:
+                        metrics.contar("visor.imagen.decodificada")
+                        img = pygame.image.load(ruta)
+                        img = pygame.transform.smoothscale(img, tamano)
+                        image_cache.guardar(ruta, tamano, "smoothscale", img)
+                    else:
+                        metrics.contar("visor.imagen.cache")
+                return img
+        except Exception:
+            pass
+        img = pygame.Surface(tamano)
+        img.fill(color)
+        return img
+
+    def cerrar(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+class VisorRelajacion:
+    """Visualizador pygame de la sesión de relajación.
+
+    Se ejecuta en un proceso propio (ver ViewerSupervisor) y se comunica con
+    Tk por una conexión de multiprocessing: recibe ("detener",) y envía
+    ("listo",), ("progreso", segundos_restantes, imagen) y ("fin", resultado).
+    """
+    TAMANO = (700, 450)  # Reduced size
+    IMAGENES = ["cascada1.jpg", "bosque1.jpg", "cascadabosque.jpg"]
+    COLORES_RESPALDO = [(0, 100, 200), (0, 150, 0), (0, 120, 100)]
+    DURACION = 90
+    INTERVALO_CAMBIO = 30
+    FPS = 30
+    # Fundido entre imágenes: duración en segundos, curva y niveles de alfa distintos
+    DURACION_TRANSICION = 2.0
+    CURVA_TRANSICION = "suave"
+    NIVELES_TRANSICION = 64
+    CURVAS = {
+        "lineal": lambda t: t,
+        "suave": lambda t: t * t * (3 - 2 * t),
+        "seno": lambda t: 0.5 - 0.5 * math.cos(math.pi * t),
+    }
+
+    def __init__(self, conexion=None, duracion_transicion=None, curva_transicion=None):
+        self.conexion = conexion
+        if duracion_transicion is not None:
+            self.DURACION_TRANSICION = duracion_transicion
+        if curva_transicion is not None:
+            self.CURVA_TRANSICION = curva_transicion
+
+    def _enviar(self, *mensaje):
+        if self.conexion is not None:
+            try:
+                self.conexion.send(mensaje)
+            except (OSError, EOFError):
+                # Tk ya no escucha; se termina la sesión
+                self.conexion = None
+
+    def _detener_solicitado(self):
+        if self.conexion is None:
+            return False
+        try:
+            while self.conexion.poll():
+                if self.conexion.recv()[0] == "detener":
+                    return True
+        except (OSError, EOFError):
+            return True
+        return False
+
+    def ejecutar(self):
+        """Muestra las imágenes hasta completar la duración; devuelve el resultado"""
+        pygame.init()
+        try:
+            return self._bucle()
+        finally:
+            pygame.quit()
+
+    def _bucle(self):
+        WIDTH, HEIGHT = self.TAMANO
+        # Las imágenes empiezan a cargarse antes de abrir la ventana
+        cargas = image_loader.cargar(self.IMAGENES, self.TAMANO, self.COLORES_RESPALDO)
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Cascadas y Bosques - Relajación Visual")
+
+        # Las imágenes que aún no terminaron de cargarse quedan en None
+        images = [None] * len(cargas)
+        
+        def recoger_cargas():
+            for i, carga in enumerate(cargas):
+                if images[i] is None and carga.done():
+                    # convert() adapta el formato de píxel al de la pantalla
+                    images[i] = carga.result().convert()
+        
+        # La primera imagen es imprescindible para el primer frame
+        images[0] = cargas[0].result().convert()
+
+        current_image = 0
+        last_change = time.time()
+        change_interval = self.INTERVALO_CAMBIO
+        start_time = time.time()
+        duration = self.DURACION
+
+        clock = pygame.time.Clock()
+        running = True
+        completada = False
+        presupuesto_frame = 1.0 / self.FPS
+        curva = self.CURVAS[self.CURVA_TRANSICION]
+        
+        # Fundido en curso: imagen saliente, instante de inicio y último nivel dibujado
+        imagen_anterior = None
+        inicio_transicion = 0.0
+        nivel_dibujado = None
+        frames_a_saltar = 0
+        
+        # Fuente y textos fijos se crean una sola vez; el temporizador solo
+        # se vuelve a renderizar cuando cambia el segundo
+        font = pygame.font.SysFont('Arial', 20)
+        color_texto = (255, 255, 255)
+        inst_text = font.render("Presiona ESC para salir", True, color_texto)
+        textos_imagen = {}
+        timer_text = None
+        ultimo_segundo = None
+        timer_rect = None
+        redibujar_todo = True
+        
+        def dibujar_textos():
+            if len(images) > 1:
+                if current_image not in textos_imagen:
+                    textos_imagen[current_image] = font.render(
+                        f"Imagen {current_image + 1}/{len(images)}", True, color_texto)
+                screen.blit(textos_imagen[current_image], (15, 40))
+            # Instrucciones
+            screen.blit(inst_text, (15, HEIGHT - 30))
+            if timer_text is not None:
+                screen.blit(timer_text, (15, 15))
+
+        while running:
+            inicio_frame = time.perf_counter()
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    running = False
+                elif event.type == pygame.VIDEOEXPOSE:
+                    redibujar_todo = True
+            if self._detener_solicitado():
+                running = False
+            
+            recoger_cargas()
+            
+            # Cambiar imagen cada 30 segundos, si la siguiente ya está cargada
+            siguiente = (current_image + 1) % len(images)
+            if (imagen_anterior is None and time.time() - last_change >= change_interval
+                    and len(images) > 1 and images[siguiente] is not None):
+                if self.DURACION_TRANSICION > 0:
+                    imagen_anterior = images[current_image]
+                    inicio_transicion = time.time()
+                    nivel_dibujado = None
+                current_image = siguiente
+                last_change = time.time()
+                redibujar_todo = True
+            
+            elapsed = time.time() - start_time
+            remaining = max(0, duration - elapsed)
+            segundo = int(remaining)
+            cambio_segundo = segundo != ultimo_segundo
+            if cambio_segundo:
+                mins, secs = divmod(segundo, 60)
+                timer_text = font.render(f"Tiempo: {mins:02d}:{secs:02d}", True, color_texto)
+                if ultimo_segundo is None:
+                    self._enviar("listo")
+                self._enviar("progreso", segundo, current_image)
+                ultimo_segundo = segundo
+            
+            fondo = images[current_image]
+            if imagen_anterior is not None:
+                # El alfa depende del tiempo transcurrido, no de los frames
+                # dibujados, así que un frame lento no alarga el fundido
+                progreso = min(1.0, (time.time() - inicio_transicion) / self.DURACION_TRANSICION)
+                nivel = round(curva(progreso) * self.NIVELES_TRANSICION)
+                if progreso >= 1.0:
+                    fondo.set_alpha(None)
+                    imagen_anterior = None
+                    redibujar_todo = True
+                elif frames_a_saltar > 0:
+                    frames_a_saltar -= 1
+                elif nivel != nivel_dibujado:
+                    screen.blit(imagen_anterior, (0, 0))
+                    fondo.set_alpha(int(255 * nivel / self.NIVELES_TRANSICION))
+                    screen.blit(fondo, (0, 0))
+                    fondo.set_alpha(None)
+                    dibujar_textos()
+                    pygame.display.flip()
+                    nivel_dibujado = nivel
+                    # Si el frame excedió su presupuesto, se omiten los siguientes
+                    costo = time.perf_counter() - inicio_frame
+                    frames_a_saltar = int(costo / presupuesto_frame)
+                redibujar_todo = redibujar_todo and imagen_anterior is None
+            
+            if imagen_anterior is None:
+                if redibujar_todo:
+                    screen.blit(fondo, (0, 0))
+                    dibujar_textos()
+                    timer_rect = screen.get_rect().clip(timer_text.get_rect(topleft=(15, 15)))
+                    pygame.display.flip()
+                    redibujar_todo = False
+                elif cambio_segundo:
+                    zonas_sucias = []
+                    if timer_rect is not None:
+                        # Restaurar el fondo bajo el texto anterior
+                        screen.blit(fondo, timer_rect, timer_rect)
+                        zonas_sucias.append(timer_rect)
+                    timer_rect = screen.blit(timer_text, (15, 15))
+                    zonas_sucias.append(timer_rect)
+                    pygame.display.update(zonas_sucias)
+            clock.tick(self.FPS)
+            
+            if elapsed >= duration:
+                completada = True
+                running = False
+
+        return {"completada": completada, "segundos": round(time.time() - start_time, 1)}
+
+def _proceso_visor(conexion):
+    """Punto de entrada del proceso hijo del visualizador"""
+    visor = VisorRelajacion(conexion)
+    try:
+        resultado = visor.ejecutar()
+    except Exception as e:
+        resultado = {"completada": False, "error": str(e)}
+    finally:
+        image_loader.cerrar()
+        # El hijo escribe su propio archivo de métricas
+        metrics.guardar()
+    visor._enviar("fin", resultado)
+    conexion.close()
+
+class SesionVisor:
+    """Un visualizador en ejecución, visto desde el proceso de Tk"""
+    INTERVALO_SONDEO = 100  # ms
+
+    def __init__(self, supervisor, root, proceso, conexion, on_mensaje):
+        self.supervisor = supervisor
+        self.root = root
+        self.proceso = proceso
+        self.conexion = conexion
+        self.on_mensaje = on_mensaje
+        self.terminada = False
+        self._lock = threading.Lock()
+        self.root.after(self.INTERVALO_SONDEO, self._sondear)
+
+    def detener(self, notificar=True):
+        """Pide al visualizador que cierre; sin notificar, no se entrega el 'fin'"""
+        if not notificar:
+            self.on_mensaje = None
+        try:
+            self.conexion.send(("detener",))
+        except (OSError, EOFError):
+            pass
+
+    def esperar(self, timeout=2.0):
+        """Espera al proceso y lo fuerza a terminar si no responde"""
+        self.proceso.join(timeout)
+        if self.proceso.is_alive():
+            self.proceso.terminate()
+            self.proceso.join(timeout)
+        self._finalizar()
+
+    def recoger(self):
+        """Espera al proceso en un hilo aparte para no congelar la interfaz"""
+        threading.Thread(target=self.esperar, name="SesionVisor-recoger",
+                         daemon=True).start()
+
+    def _sondear(self):
+        if self.terminada:
+            return
+        mensajes = []
+        try:
+            while self.conexion.poll():
+                mensajes.append(self.conexion.recv())
+        except (OSError, EOFError):
+            # El proceso murió sin enviar "fin" (p. ej. un fallo de SDL)
+            codigo = self.proceso.exitcode
+            mensajes.append(("fin", {"completada": False,
+                                     "error": f"El visualizador terminó inesperadamente "
+                                              f"(código {codigo})"}))
+        for mensaje in mensajes:
+            self._entregar(mensaje)
+            if mensaje[0] == "fin":
+                self.recoger()
+                return
+        try:
+            self.root.after(self.INTERVALO_SONDEO, self._sondear)
+        except tk.TclError:
+            # La ventana se cerró: la sesión ya no tiene a quién informar
+            self.detener(notificar=False)
+            self.recoger()
+
+    def _entregar(self, mensaje):
+        if self.on_mensaje is None:
+            return
+        try:
+            self.on_mensaje(*mensaje)
+        except tk.TclError:
+            self.on_mensaje = None
+        except Exception:
+            # Se informa como cualquier callback de Tk; el sondeo sigue y
+            # el proceso se recoge igual al llegar "fin"
+            self.root._root().report_callback_exception(*sys.exc_info())
+
+    def _finalizar(self):
+        # Puede llegar a la vez desde recoger() y desde detener_todas()
+        with self._lock:
+            if self.terminada:
+                return
+            self.terminada = True
+        self.conexion.close()
+        self.supervisor._retirar(self)
+
+class ViewerSupervisor:
+    """Lanza y supervisa visualizadores en procesos separados"""
+    def __init__(self):
+        # spawn evita heredar por fork el estado de Tk/X11 del proceso principal
+        self._contexto = multiprocessing.get_context("spawn")
+        self.sesiones = []
+
+    def iniciar(self, root, on_mensaje):
+        """Arranca un visualizador; on_mensaje(tipo, *datos) se llama en el hilo de Tk"""
+        conexion, conexion_hijo = self._contexto.Pipe()
+        proceso = self._contexto.Process(target=_proceso_visor, args=(conexion_hijo,),
+                                         name="VisorRelajacion", daemon=True)
+        proceso.start()
+        conexion_hijo.close()
+        sesion = SesionVisor(self, root, proceso, conexion, on_mensaje)
+        self.sesiones.append(sesion)
+        return sesion
+
+    def detener_todas(self):
+        for sesion in list(self.sesiones):
+            sesion.detener(notificar=False)
+        for sesion in list(self.sesiones):
+            sesion.esperar()
+
+    def _retirar(self, sesion):
+        if sesion in self.sesiones:
+            self.sesiones.remove(sesion)
+
+class GradientLUT:
+    """Degradado cíclico precalculado como tabla de colores '#rrggbb'.
+
+    La fase se mide en colores: de la fase 0 a la 1 se pasa del primer
+    color al segundo en `pasos` entradas, y así sucesivamente.
+    """
+    _tablas = {}
+
+    def __init__(self, colores, pasos):
+        self.colores = tuple(colores)
+        self.pasos = pasos
+        self.tabla = self._construir()
+
+    @classmethod
+    def obtener(cls, colores, pasos):
+        """Devuelve la tabla compartida para esa paleta y cantidad de pasos"""
+        clave = (tuple(colores), pasos)
+        if clave not in cls._tablas:
+            cls._tablas[clave] = cls(colores, pasos)
+        return cls._tablas[clave]
+
+    def _construir(self):
+        rgb = [tuple(int(c[i:i+2], 16) for i in (1, 3, 5)) for c in self.colores]
+        tabla = []
+        for idx, rgb1 in enumerate(rgb):
+            rgb2 = rgb[(idx + 1) % len(rgb)]
+            for paso in range(self.pasos):
+                f = paso / self.pasos
+                tabla.append('#%02x%02x%02x' % tuple(int(rgb1[i] + (rgb2[i] - rgb1[i]) * f)
+                                                     for i in range(3)))
+        return tabla
+
+    def color(self, fase):
+        return self.tabla[int(fase * self.pasos) % len(self.tabla)]
+
+class Trayectoria:
+    """Recorrido de seguimiento ocular precalculado como arrays de coordenadas.
+
+    Las posiciones se muestrean a MUESTRAS_POR_SEGUNDO; posicion(t) es una
+    interpolación entre dos muestras vecinas. El recorrido arranca con una
+    entrada desde el centro hasta el inicio del patrón y luego se repite.
+    """
+    MUESTRAS_POR_SEGUNDO = 120
+    PATRONES = {
+        "rectangulo": "Rectángulo",
+        "elipse": "Elipse",
+        "ocho": "Ocho",
+        "lissajous": "Lissajous",
+        "sacadas": "Sacadas",
+    }
+    _cache = {}
+
+    def __init__(self, xs, ys, muestras_entrada):
+        self.xs = xs
+        self.ys = ys
+        self.muestras_entrada = muestras_entrada
+        # El ciclo incluye su muestra final, igual a la primera, para interpolar
+        self.muestras_ciclo = len(xs) - 1 - muestras_entrada
+        self.periodo = self.muestras_ciclo / self.MUESTRAS_POR_SEGUNDO
+
+    @classmethod
+    def obtener(cls, patron, centro, amplitud, velocidad, semilla=None):
+        """Devuelve el recorrido (compartido) para esos parámetros.
+
+        Las sacadas dependen de la semilla y cambian en cada sesión, así que
+        no se guardan; sin semilla se sortean fijaciones nuevas.
+        """
+        if patron == "sacadas":
+            return cls._sacadas(centro, amplitud, velocidad, semilla)
+        clave = (patron, tuple(centro), tuple(amplitud), velocidad)
+        if clave not in cls._cache:
+            cls._cache[clave] = cls.construir(patron, centro, amplitud, velocidad)
+        return cls._cache[clave]
+
+    @classmethod
+    def construir(cls, patron, centro, amplitud, velocidad, semilla=None):
+        cx, cy = centro
+        ax, ay = amplitud
+        if patron == "sacadas":
+            return cls._sacadas(centro, amplitud, velocidad, semilla)
+        if patron == "rectangulo":
+            # Desde el centro del lado derecho, en sentido horario
+            xs = np.array([cx + ax, cx + ax, cx - ax, cx - ax, cx + ax, cx + ax])
+            ys = np.array([cy, cy + ay, cy + ay, cy - ay, cy - ay, cy])
+        else:
+            theta = np.linspace(0, 2 * np.pi, 2049)
+            if patron == "elipse":
+                xs, ys = cx + ax * np.cos(theta), cy + ay * np.sin(theta)
+            elif patron == "ocho":
+                xs, ys = cx + ax * np.sin(theta), cy + ay * np.sin(2 * theta)
+            elif patron == "lissajous":
+                xs, ys = cx + ax * np.sin(3 * theta + np.pi / 2), cy + ay * np.sin(2 * theta)
+            else:
+                raise ValueError(f"Patrón de trayectoria desconocido: {patron}")
+        # Entrada recta desde el centro hasta el primer punto del patrón
+        xs = np.concatenate(([cx], xs))
+        ys = np.concatenate(([cy], ys))
+        return cls._a_velocidad_constante(xs, ys, velocidad)
+
+    @classmethod
+    def _a_velocidad_constante(cls, xs, ys, velocidad):
+        # Remuestrear por longitud de arco para recorrer a `velocidad` px/s
+        distancias = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(xs), np.diff(ys)))))
+        paso = velocidad / cls.MUESTRAS_POR_SEGUNDO
+        entrada = distancias[1]
+        muestras_entrada = int(round(entrada / paso))
+        muestras_ciclo = max(1, int(round((distancias[-1] - entrada) / paso)))
+        objetivo = np.concatenate((np.linspace(0, entrada, muestras_entrada, endpoint=False),
+                                   np.linspace(entrada, distancias[-1], muestras_ciclo + 1)))
+        return cls(np.interp(objetivo, distancias, xs), np.interp(objetivo, distancias, ys),
+                   muestras_entrada)
+
+    @classmethod
+    def _sacadas(cls, centro, amplitud, velocidad, semilla, fijaciones=16, pausa=0.8):
+        # Fijaciones al azar dentro del área; saltos rápidos entre ellas
+        rng = np.random.default_rng(semilla)
+        cx, cy = centro
+        ax, ay = amplitud
+        puntos = np.column_stack((rng.uniform(cx - ax, cx + ax, fijaciones),
+                                  rng.uniform(cy - ay, cy + ay, fijaciones)))
+        puntos = np.vstack(([cx, cy], puntos, puntos[:1]))
+        tiempos, xs, ys = [], [], []
+        t = 0.0
+        for i, (x, y) in enumerate(puntos):
+            if i > 0:
+                # El salto dura lo que tarda en recorrerse a 4 veces la velocidad
+                t += float(np.hypot(x - puntos[i - 1][0], y - puntos[i - 1][1])) / (4 * velocidad)
+            tiempos.append(t)
+            xs.append(x)
+            ys.append(y)
+            if 0 < i < len(puntos) - 1:
+                t += pausa
+                tiempos.append(t)
+                xs.append(x)
+                ys.append(y)
+        t_entrada = tiempos[1]
+        muestras_entrada = int(round(t_entrada * cls.MUESTRAS_POR_SEGUNDO))
+        muestras_ciclo = int(round((tiempos[-1] - t_entrada) * cls.MUESTRAS_POR_SEGUNDO))
+        objetivo = np.concatenate((np.linspace(0, t_entrada, muestras_entrada, endpoint=False),
+                                   np.linspace(t_entrada, tiempos[-1], muestras_ciclo + 1)))
+        return cls(np.interp(objetivo, tiempos, xs), np.interp(objetivo, tiempos, ys),
+                   muestras_entrada)
+
+    def posicion(self, t):
+        """Posición (x, y) en el instante t, en segundos"""
+        muestra = t * self.MUESTRAS_POR_SEGUNDO
+        if muestra >= self.muestras_entrada:
+            muestra = self.muestras_entrada + (muestra - self.muestras_entrada) % self.muestras_ciclo
+        i = int(muestra)
+        f = muestra - i
+        if i + 1 >= len(self.xs):
+            return float(self.xs[-1]), float(self.ys[-1])
+        x = self.xs[i] + (self.xs[i + 1] - self.xs[i]) * f
+        y = self.ys[i] + (self.ys[i + 1] - self.ys[i]) * f
+        return float(x), float(y)
+
+class AnimationClock:
+    """Reloj único de animación para Tk, basado en un temporizador monótono.
+
+    Llama a on_tick(transcurrido) con los segundos de animación (sin contar
+    las pausas), de modo que cada propiedad animada se calcula a partir del
+    tiempo y no del número de ticks. El intervalo entre ticks se adapta al
+    costo medido de on_tick.
+    """
+    INTERVALO_MIN = 0.016
+    INTERVALO_MAX = 0.1
+    # Fracción máxima del tiempo que puede ocupar el trabajo de animación
+    CARGA_MAXIMA = 0.25
+
+    def __init__(self, root, on_tick):
+        self.root = root
+        self.on_tick = on_tick
+        self.intervalo = self.INTERVALO_MIN
+        self.costo_medio = 0.0
+        self._inicio = None
+        self._pausado_en = None
+        self._id_after = None
+        self.activo = False
+
+    def iniciar(self):
+        self._inicio = time.monotonic()
+        self._pausado_en = None
+        self.activo = True
+        self._tick()
+
+    def pausado(self):
+        return self._pausado_en is not None
+
+    def pausar(self):
+        if self.activo and self._pausado_en is None:
+            self._pausado_en = time.monotonic()
+            self._cancelar()
+
+    def reanudar(self):
+        if self.activo and self._pausado_en is not None:
+            # El tiempo en pausa no cuenta como tiempo de animación
+            self._inicio += time.monotonic() - self._pausado_en
+            self._pausado_en = None
+            self._tick()
+
+    def detener(self):
+        self.activo = False
+        self._cancelar()
+
+    def _cancelar(self):
+        if self._id_after is not None:
+            try:
+                self.root.after_cancel(self._id_after)
+            except tk.TclError:
+                pass
+            self._id_after = None
+
+    def _tick(self):
+        self._id_after = None
+        if not self.activo or self._pausado_en is not None:
+            return
+        inicio = time.monotonic()
+        try:
+            self.on_tick(inicio - self._inicio)
+        except tk.TclError:
+            # Los widgets animados ya no existen
+            self.detener()
+            return
+        if not self.activo or self._pausado_en is not None:
+            return
+        costo = time.monotonic() - inicio
+        metrics.registrar("animacion.tick", costo)
+        self.costo_medio = costo if not self.costo_medio else 0.9 * self.costo_medio + 0.1 * costo
+        self.intervalo = min(self.INTERVALO_MAX,
+                             max(self.INTERVALO_MIN, self.costo_medio / self.CARGA_MAXIMA))
+        espera = max(0.0, self.intervalo - (time.monotonic() - inicio))
+        try:
+            self._id_after = self.root.after(int(espera * 1000), self._tick)
+        except tk.TclError:
+            self.activo = False
+
+class ResultStore:
+    """Guarda los resultados de los ejercicios en SQLite sin bloquear la interfaz.
+
+    registrar() solo encola el resultado; un hilo escritor con su propia
+    conexión los inserta por lotes en una transacción. La base usa WAL para
+    que las lecturas no esperen a las escrituras.
+    """
+    LOTE_MAXIMO = 256
+    # Tiempo que el escritor espera a que se acumulen más resultados
+    ESPERA_LOTE = 0.5
+    # Si la base no se puede abrir o escribir, los resultados esperan en
+    # memoria y el escritor reintenta con esta pausa
+    REINTENTO = 5.0
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS resultados (
+            id INTEGER PRIMARY KEY,
+            sesion TEXT NOT NULL,
+            estacion TEXT NOT NULL,
+            ejercicio TEXT NOT NULL,
+            esperada TEXT,
+            dada TEXT,
+            correcta INTEGER NOT NULL,
+            inicio REAL,
+            fin REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS resultados_ejercicio ON resultados (ejercicio, fin);
+    """
+    _FIN = object()
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta or os.path.join(file_manager.base_dir, "resultados.sqlite3")
+        self.sesion = uuid.uuid4().hex
+        self.estacion = socket.gethostname()
+        self._cola = queue.Queue()
+        self._hilo = None
+        self._cerrando = None
+        self._lock = threading.Lock()
+        # Último fallo de la base, o None si el escritor funciona
+        self.error = None
+
+    def registrar(self, ejercicio, esperada, dada, correcta, inicio=None, fin=None,
+                  estacion=None, sesion=None):
+        """Encola un resultado; vuelve de inmediato.
+
+        estacion y sesion permiten que varias estaciones virtuales compartan
+        el mismo almacén.
+        """
+        fila = (sesion or self.sesion, estacion or self.estacion, ejercicio,
+                None if esperada is None else str(esperada),
+                None if dada is None else str(dada),
+                int(bool(correcta)), inicio, fin if fin is not None else time.time())
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._cerrando = threading.Event()
+                self._hilo = threading.Thread(target=self._escritor, args=(self._cerrando,),
+                                              name="ResultStore", daemon=True)
+                self._hilo.start()
+        self._cola.put(fila)
+        metrics.contar("resultados.encolados")
+
+    def cerrar(self, timeout=2.0):
+        """Escribe lo pendiente y detiene el hilo escritor"""
+        with self._lock:
+            hilo, cerrando = self._hilo, self._cerrando
+            self._hilo = None
+        if hilo is not None and hilo.is_alive():
+            self._cola.put(self._FIN)
+            # Interrumpe la pausa entre reintentos si la base sigue fallando
+            cerrando.set()
+            hilo.join(timeout)
+
+    def _abrir(self):
+        conexion = sqlite3.connect(self.ruta)
+        try:
+            conexion.execute("PRAGMA journal_mode=WAL")
+            # Con WAL, NORMAL solo arriesga la última transacción ante un corte de luz
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            conexion.executescript(self.ESQUEMA)
+        except sqlite3.Error:
+            conexion.close()
+            raise
+        return conexion
+
+    def _escritor(self, cerrando):
+        conexion = None
+        lote = []
+        terminar = False
+        try:
+            while True:
+                if not lote:
+                    if terminar:
+                        break
+                    lote, terminar = self._siguiente_lote()
+                    if not lote:
+                        break
+                try:
+                    if conexion is None:
+                        conexion = self._abrir()
+                    with metrics.span("resultados.escribir_lote"), conexion:
+                        conexion.executemany(
+                            "INSERT INTO resultados (sesion, estacion, ejercicio, esperada, "
+                            "dada, correcta, inicio, fin) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            lote)
+                except sqlite3.Error as e:
+                    self._fallo(e)
+                    if conexion is not None:
+                        conexion.close()
+                        conexion = None
+                    # El lote se conserva; al cerrar se hace un último intento
+                    if cerrando.is_set():
+                        pendientes = len(lote) + self._vaciar_cola()
+                        print(f"Se descartan {pendientes} resultados sin guardar",
+                              file=sys.stderr)
+                        break
+                    cerrando.wait(self.REINTENTO)
+                    continue
+                lote = []
+                if self.error is not None:
+                    print("La base de resultados vuelve a estar disponible", file=sys.stderr)
+                    self.error = None
+        finally:
+            if conexion is not None:
+                conexion.close()
+
+    def _siguiente_lote(self):
+        """Espera un resultado y junta los que lleguen poco después"""
+        fila = self._cola.get()
+        if fila is self._FIN:
+            return [], True
+        lote = [fila]
+        limite = time.monotonic() + self.ESPERA_LOTE
+        while len(lote) < self.LOTE_MAXIMO:
+            try:
+                fila = self._cola.get(timeout=max(0.0, limite - time.monotonic()))
+            except queue.Empty:
+                break
+            if fila is self._FIN:
+                return lote, True
+            lote.append(fila)
+        return lote, False
+
+    def _vaciar_cola(self):
+        """Descarta lo encolado y devuelve cuántos resultados había"""
+        descartados = 0
+        while True:
+            try:
+                fila = self._cola.get_nowait()
+            except queue.Empty:
+                return descartados
+            if fila is not self._FIN:
+                descartados += 1
+
+    def _fallo(self, error):
+        # Se informa una sola vez por racha de fallos, no en cada reintento
+        metrics.contar("resultados.fallos")
+        if self.error is None:
+            print(f"No se pueden guardar los resultados en {self.ruta}: {error}. "
+                  f"Se conservan en memoria y se reintentará.", file=sys.stderr)
+        self.error = error
+
+class Ejercicio:
+    """Ejercicio de terapia como máquina de estados, independiente de Tk.
+
+    preparado -> estimulo -> esperando_respuesta -> terminado (o cancelado).
+    Una interfaz lo maneja llamando a iniciar(), pedir_respuesta() y
+    responder(); ejecutar() recorre los mismos estados con asyncio, para
+    estaciones virtuales sin ventana. Cada cambio se notifica con
+    on_evento(ejercicio, evento, datos).
+    """
+    nombre = "ejercicio"
+
+    def __init__(self, rng=None, on_evento=None, registro=None):
+        self.rng = rng or random
+        self.on_evento = on_evento
+        # Por defecto los resultados van al almacén global
+        self.registro = registro
+        self.estado = "preparado"
+        self.inicio = None
+        self.resultado = None
+        self.respuesta_correcta = None
+        self._loop = None
+        self._respondido = None
+
+    def iniciar(self):
+        self._exigir("preparado")
+        self.inicio = time.time()
+        self._cambiar("estimulo")
+
+    def pedir_respuesta(self):
+        self._exigir("estimulo")
+        self._cambiar("esperando_respuesta")
+
+    def responder(self, dada):
+        """Evalúa y registra la respuesta; devuelve el resultado"""
+        self._exigir("esperando_respuesta")
+        self.resultado = {"ejercicio": self.nombre, "esperada": self.respuesta_correcta,
+                          "dada": dada, "correcta": self.es_correcta(dada),
+                          "inicio": self.inicio, "fin": time.time()}
+        registro = self.registro or result_store.registrar
+        registro(self.nombre, self.respuesta_correcta, dada, self.resultado["correcta"],
+                 inicio=self.inicio, fin=self.resultado["fin"])
+        self._cambiar("terminado", **self.resultado)
+        self._avisar_fin()
+        return self.resultado
+
+    def cancelar(self):
+        if self.estado in ("terminado", "cancelado"):
+            return
+        self._cambiar("cancelado")
+        self._avisar_fin()
+
+    def es_correcta(self, dada):
+        return dada == self.respuesta_correcta
+
+    async def ejecutar(self, responder=None, timeout=None):
+        """Recorre el ejercicio en el loop actual.
+
+        responder(ejercicio) es una corrutina que devuelve la respuesta, p. ej.
+        un paciente simulado; sin ella se espera a que otro llame a
+        responder(). Devuelve el resultado, o None si se canceló o se agotó
+        el tiempo.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._respondido = self._loop.create_future()
+        self.iniciar()
+        await self._estimulo()
+        if self.estado != "estimulo":
+            return self.resultado
+        self.pedir_respuesta()
+
+        async def esperar_respuesta():
+            if responder is not None:
+                dada = await responder(self)
+                if self.estado == "esperando_respuesta":
+                    self.responder(dada)
+            await asyncio.shield(self._respondido)
+
+        # Un único plazo cubre al paciente simulado y la espera del resultado
+        try:
+            await asyncio.wait_for(esperar_respuesta(), timeout)
+        except asyncio.TimeoutError:
+            self.cancelar()
+        return self.resultado
+
+    async def _estimulo(self):
+        """Fase de estímulo; las subclases esperan aquí lo que haga falta"""
+
+    def _exigir(self, estado):
+        if self.estado != estado:
+            raise RuntimeError(f"{self.nombre}: se esperaba el estado '{estado}' "
+                               f"y está en '{self.estado}'")
+
+    def _cambiar(self, estado, **datos):
+        self.estado = estado
+        self._emitir(estado, **datos)
+
+    def _emitir(self, evento, **datos):
+        if self.on_evento is not None:
+            self.on_evento(self, evento, datos)
+
+    def _avisar_fin(self):
+        # responder() puede llegar desde el hilo de Tk o desde otro loop
+        if self._respondido is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._resolver)
+
+    def _resolver(self):
+        if not self._respondido.done():
+            self._respondido.set_result(self.resultado)
+
+class EjercicioIdentificarSonido(Ejercicio):
+    """Escuchar un sonido y elegirlo entre las opciones de su categoría"""
+    CATEGORIAS = {
+        "auditiva.ruidos": {"blanco": "Ruido Blanco", "rosa": "Ruido Rosa",
+                            "marrón": "Ruido Marrón"},
+        "auditiva.ambientales": {"lluvia": "Lluvia", "olas": "Olas del mar",
+                                 "bosque": "Bosque"},
+        "auditiva.animales": {"perro": "Perro", "gato": "Gato", "pajaro": "Pájaro"},
+    }
+
+    def __init__(self, sonido, **kwargs):
+        super().__init__(**kwargs)
+        self.sonido = sonido
+        # Lo que no es ruido ni ambiental se pregunta como animal
+        self.nombre = next((nombre for nombre, sonidos in self.CATEGORIAS.items()
+                            if sonido in sonidos), "auditiva.animales")
+        etiquetas = self.CATEGORIAS[self.nombre]
+        self.respuesta_correcta = etiquetas.get(sonido, "Pájaro")
+        self.opciones = list(etiquetas.values())
+        self.rng.shuffle(self.opciones)
+
+    def iniciar(self):
+        super().iniciar()
+        self._emitir("reproducir", sonido=self.sonido)
+
+    def repetir(self):
+        if self.estado in ("estimulo", "esperando_respuesta"):
+            self._emitir("reproducir", sonido=self.sonido)
+
+class EjercicioContarManzanas(Ejercicio):
+    """Observar frutas dispersas y decir cuántas manzanas había"""
+    nombre = "visual.contar_manzanas"
+    TIEMPO_OBSERVACION = 15
+    # Zona donde caen los centros de las frutas (x1, y1, x2, y2)
+    AREA = (40, 40, 660, 360)
+
+    def __init__(self, tiempo_observacion=None, area=None, **kwargs):
+        super().__init__(**kwargs)
+        self.tiempo_observacion = (self.TIEMPO_OBSERVACION if tiempo_observacion is None
+                                   else tiempo_observacion)
+        x1, y1, x2, y2 = area or self.AREA
+        total_manzanas = self.rng.randint(3, 7)
+        total_mandarinas = self.rng.randint(5, 10)
+        self.manzanas = [(self.rng.randint(x1, x2), self.rng.randint(y1, y2))
+                         for _ in range(total_manzanas)]
+        self.mandarinas = [(self.rng.randint(x1, x2), self.rng.randint(y1, y2))
+                           for _ in range(total_mandarinas)]
+        self.respuesta_correcta = total_manzanas
+
+    async def _estimulo(self):
+        await asyncio.sleep(self.tiempo_observacion)
+
+class Estacion:
+    """Una estación (real o virtual) que encadena ejercicios en una sesión"""
+    def __init__(self, nombre, almacen=None):
+        self.nombre = nombre
+        self.sesion = uuid.uuid4().hex
+        self.almacen = almacen
+        self.resultados = []
+
+    def registrar(self, *args, **kwargs):
+        almacen = self.almacen or result_store
+        almacen.registrar(*args, estacion=self.nombre, sesion=self.sesion, **kwargs)
+
+    async def ejecutar(self, ejercicios, responder=None, timeout=None):
+        for ejercicio in ejercicios:
+            ejercicio.registro = self.registrar
+            resultado = await ejercicio.ejecutar(responder, timeout)
+            if resultado is not None:
+                self.resultados.append(resultado)
+        return self.resultados
+
+def paciente_simulado(acierto=0.8, demora=(0.5, 3.0), rng=None):
+    """Corrutina de respuesta para estaciones virtuales: acierta con probabilidad `acierto`"""
+    rng = rng or random.Random()
+
+    async def responder(ejercicio):
+        await asyncio.sleep(rng.uniform(*demora))
+        if rng.random() < acierto:
+            return ejercicio.respuesta_correcta
+        if isinstance(ejercicio, EjercicioIdentificarSonido):
+            return rng.choice([o for o in ejercicio.opciones
+                               if o != ejercicio.respuesta_correcta])
+        return ejercicio.respuesta_correcta + rng.choice((-2, -1, 1, 2))
+    return responder
+
+async def simular_estaciones(cantidad, ejercicios=5, tiempo_observacion=0.5,
+                             demora=(0.05, 0.2), almacen=None, semilla=None):
+    """Corre `cantidad` estaciones virtuales a la vez en el loop actual"""
+    rng = random.Random(semilla)
+    sonidos = [s for sonidos in EjercicioIdentificarSonido.CATEGORIAS.values()
+               for s in sonidos]
+
+    def sesion():
+        for _ in range(ejercicios):
+            if rng.random() < 0.5:
+                yield EjercicioIdentificarSonido(rng.choice(sonidos), rng=rng)
+            else:
+                yield EjercicioContarManzanas(tiempo_observacion, rng=rng)
+
+    estaciones = [Estacion(f"virtual-{i:04d}", almacen) for i in range(cantidad)]
+    await asyncio.gather(*(estacion.ejecutar(sesion(), paciente_simulado(demora=demora, rng=rng))
+                           for estacion in estaciones))
+    return estaciones
+
+audio_player = AudioPlayer()
+audio_cache = AudioCache()
+noise_bank = NoiseBank()
+image_cache = ImageCache()
+image_loader = ImageLoader()
+viewer_supervisor = ViewerSupervisor()
+result_store = ResultStore()
 
 class TerapiaAuditiva:
+    # Capas del paisaje sonoro: (sonido, ganancia)
+    PAISAJE = [("lluvia", 0.8), ("olas", 0.6), ("marrón", 0.3)]
+
     def __init__(self, root, parent_window=None):
         self.root = root
         self.parent_window = parent_window
         self.root.title("Terapia Auditiva")
         self.root.geometry("700x450")  # Reduced from 1024x600
         self.root.configure(bg=COLOR_FONDO)
+        file_manager.refresh_assets()
+        noise_bank.precalentar()
+        self.pantallas = ScreenManager(self.root, "auditiva")
+        self.ejercicio_actual = None
         self.clear_and_setup()
 
     def clear_and_setup(self):
-        # Clear all widgets
-        for widget in self.root.winfo_children():
-            widget.destroy()
-        self.setup_ui()
+        # Al volver al menú se corta el sonido que siga sonando
+        audio_player.detener()
+        if self.ejercicio_actual is not None:
+            self.ejercicio_actual.cancelar()
+            self.ejercicio_actual = None
+        self.pantallas.mostrar("menu", self.setup_ui)
         self.verificar_archivos()
 
-    def setup_ui(self):
+    def setup_ui(self, pantalla):
         # Frame principal
-        main_frame = tk.Frame(self.root, bg=COLOR_FONDO)
+        main_frame = tk.Frame(pantalla, bg=COLOR_FONDO)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
         
         # Título
@@ -232,20 +2498,16 @@ class TerapiaAuditiva:
 
     def volver_menu_principal(self):
         """Vuelve al menú principal"""
-        self.root.destroy()
+        audio_player.detener()
+        # La ventana se oculta y se reutiliza la próxima vez
+        self.root.withdraw()
         if self.parent_window:
             self.parent_window.deiconify()
 
-    def clear_window_and_show_content(self, setup_function):
-        """Clear current window and show new content"""
-        for widget in self.root.winfo_children():
-            widget.destroy()
-        setup_function()
-
     def abrir_ruidos_terapeuticos(self):
-        def setup_ruidos():
+        def setup_ruidos(pantalla):
             # Frame principal
-            main_frame = tk.Frame(self.root, bg=COLOR_FONDO)
+            main_frame = tk.Frame(pantalla, bg=COLOR_FONDO)
             main_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
             
             # Título
@@ -285,12 +2547,12 @@ class TerapiaAuditiva:
                 width=120, height=50, corner_radius=15,
                 command=self.clear_and_setup).pack()
         
-        self.clear_window_and_show_content(setup_ruidos)
+        self.pantallas.mostrar("ruidos", setup_ruidos)
 
     def abrir_sonidos_ambientales(self):
-        def setup_ambientales():
+        def setup_ambientales(pantalla):
             # Frame principal
-            main_frame = tk.Frame(self.root, bg=COLOR_FONDO)
+            main_frame = tk.Frame(pantalla, bg=COLOR_FONDO)
             main_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
             
             # Título
@@ -324,18 +2586,32 @@ class TerapiaAuditiva:
             nav_frame = tk.Frame(main_frame, bg=COLOR_FONDO)
             nav_frame.pack(side=tk.BOTTOM, pady=15)
             
+            # Todas las capas a la vez, hasta Detener o Volver
+            SemicuadradoButton(nav_frame, 
+                text="Paisaje Sonoro", 
+                bg="#E67E22", active_bg="#D35400",
+                width=140, height=50, corner_radius=15,
+                command=lambda: self.reproducir_paisaje(self.PAISAJE)).pack(side=tk.LEFT, padx=8)
+            
+            SemicuadradoButton(nav_frame, 
+                text="■ Detener", 
+                bg="#E74C3C", active_bg="#C0392B",
+                width=120, height=50, corner_radius=15,
+                command=audio_player.detener).pack(side=tk.LEFT, padx=8)
+            
             SemicuadradoButton(nav_frame, 
                 text="← Volver", 
                 bg=COLOR_BOTON_VOLVER, active_bg=COLOR_BOTON_VOLVER_ACTIVO,
                 width=120, height=50, corner_radius=15,
-                command=self.clear_and_setup).pack()
+                command=self.clear_and_setup).pack(side=tk.LEFT, padx=8)
         
-        self.clear_window_and_show_content(setup_ambientales)
+        self.precargar_sonidos(["lluvia", "olas", "bosque"])
+        self.pantallas.mostrar("ambientales", setup_ambientales)
 
     def abrir_sonidos_animales(self):
-        def setup_animales():
+        def setup_animales(pantalla):
             # Frame principal
-            main_frame = tk.Frame(self.root, bg=COLOR_FONDO)
+            main_frame = tk.Frame(pantalla, bg=COLOR_FONDO)
             main_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
             
             # Título
@@ -375,7 +2651,8 @@ class TerapiaAuditiva:
                 width=120, height=50, corner_radius=15,
                 command=self.clear_and_setup).pack()
         
-        self.clear_window_and_show_content(setup_animales)
+        self.precargar_sonidos(["perro", "gato", "pajaro"])
+        self.pantallas.mostrar("animales", setup_animales)
 
     def verificar_archivos(self):
         archivos_necesarios = ["perro.wav", "gato.wav", "pajaro.wav", 
@@ -389,164 +2666,199 @@ class TerapiaAuditiva:
                                  f"{', '.join(faltantes)}\n\n"
                                  f"Se generarán sonidos alternativos.")
 
-    def generar_ruido(self, tipo, duracion=5, sample_rate=44100):
-        samples = int(sample_rate * duracion)
-        
-        if tipo == "blanco":
-            signal = np.random.uniform(-1, 1, samples)
-        elif tipo == "rosa":
-            # Ruido rosa mejorado
-            white = np.random.randn(samples)
-            b = np.array([0.049922035, -0.095993537, 0.050612699, -0.004408786])
-            a = np.array([1, -2.494956002, 2.017265875, -0.522189400])
-            signal = np.convolve(white, b, mode='same')
-        else:  # marrón
-            # Ruido marrón (browniano)
-            white = np.random.randn(samples)
-            signal = np.cumsum(white)
-        
-        # Normalizar
-        signal = signal / np.max(np.abs(signal)) * 0.5
-        signal = (signal * 32767).astype(np.int16)
-        return signal.tobytes()
+    def precargar_sonidos(self, sonidos):
+        """Lleva a la caché los sonidos del menú para que las repeticiones no lean disco"""
+        audio_cache.precargar([file_manager.get_sound_path(f"{sonido}.wav")
+                               for sonido in sonidos
+                               if file_manager.sound_exists(f"{sonido}.wav")])
 
-    def reproducir_ruido(self, tipo):
+    def reproducir_paisaje(self, capas, fade_in=2.0):
+        """Mezcla varias capas a la vez, p. ej. [("lluvia", 0.8), ("olas", 0.6), ("marrón", 0.3)].
+
+        Los sonidos se repiten y el ruido se sintetiza sin fin hasta llamar
+        a audio_player.detener().
+        """
+        audio_player.detener()
+        for sonido, ganancia in capas:
+            try:
+                if sonido in NoiseBank.ARCHIVOS:
+                    audio_player.agregar_capa(NoiseSynth(sonido).bloques_pcm(),
+                                              sample_rate=noise_bank.sample_rate,
+                                              ganancia=ganancia, fade_in=fade_in)
+                    continue
+                archivo = file_manager.get_sound_path(f"{sonido}.wav")
+                fuente = audio_cache.cargar(archivo)
+                audio_player.agregar_capa(fuente.bloques(bucle=True),
+                                          sample_rate=fuente.sample_rate,
+                                          sample_width=fuente.sample_width,
+                                          channels=fuente.channels,
+                                          ganancia=ganancia, fade_in=fade_in)
+            except Exception as e:
+                messagebox.showerror("Error", f"No se pudo reproducir {sonido}: {str(e)}")
+
+    def reproducir_ruido(self, tipo, duracion=5):
         try:
-            audio_data = self.generar_ruido(tipo)
-            AudioPlayer.reproducir(audio_data)
+            if duracion is None or duracion > NoiseBank.DURACION:
+                # Sesiones largas: síntesis continua, sin repetir el mismo buffer
+                bloques = NoiseSynth(tipo).bloques_pcm(duracion)
+            else:
+                # El banco entrega el ruido ya generado; nada se calcula al hacer
+                # clic ni en el hilo de audio
+                bloques = noise_bank.bloques_en_bucle(tipo, duracion)
+            audio_player.reproducir_bloques(bloques, sample_rate=noise_bank.sample_rate)
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo generar el ruido {tipo}: {str(e)}")
 
     def reproducir_sonido(self, sonido):
         try:
             archivo = file_manager.get_sound_path(f"{sonido}.wav")
-            if not os.path.exists(archivo):
+            if not file_manager.sound_exists(f"{sonido}.wav"):
                 messagebox.showwarning("Archivo no encontrado", 
                                      f"El archivo {sonido}.wav no existe.\n"
                                      f"Colócalo en la carpeta 'sounds'.")
                 return
                 
-            with wave.open(archivo, 'rb') as wf:
-                audio_data = wf.readframes(wf.getnframes())
-                AudioPlayer.reproducir(
-                    audio_data,
-                    sample_rate=wf.getframerate(),
-                    sample_width=wf.getsampwidth(),
-                    channels=wf.getnchannels()
-                )
+            # Los bloques son vistas del archivo mapeado: el primero suena sin
+            # esperar al resto y las repeticiones reutilizan la misma memoria
+            fuente = audio_cache.cargar(archivo)
+            audio_player.reproducir_bloques(
+                fuente.bloques(),
+                sample_rate=fuente.sample_rate,
+                sample_width=fuente.sample_width,
+                channels=fuente.channels
+            )
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo reproducir {sonido}: {str(e)}")
 
     def reproducir_sonido_con_pregunta(self, sonido, ventana_actual):
+        # La lógica del ejercicio vive en el motor; aquí solo se muestra
+        # Un paisaje en curso taparía el sonido de la pregunta
+        audio_player.detener()
+        if self.ejercicio_actual is not None:
+            self.ejercicio_actual.cancelar()
+        self.ejercicio_actual = EjercicioIdentificarSonido(
+            sonido, on_evento=self.on_evento_ejercicio)
         # Reproducir sonido
-        if sonido in ["blanco", "rosa", "marrón"]:
-            self.reproducir_ruido(sonido)
-        else:
-            self.reproducir_sonido(sonido)
+        self.ejercicio_actual.iniciar()
         
-        def setup_pregunta():
-            # Clear current content
-            for widget in self.root.winfo_children():
-                widget.destroy()
-            
-            # Frame principal
-            main_frame = tk.Frame(self.root, bg=COLOR_FONDO)
-            main_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
-            
-            # Título
-            tk.Label(main_frame, text="¿Qué sonido escuchaste?", 
-                    font=FUENTE_TITULO, bg=COLOR_FONDO).pack(pady=15)
-            
-            # Determinar opciones y respuesta correcta
-            if sonido in ["blanco", "rosa", "marrón"]:
-                opciones = ["Ruido Blanco", "Ruido Rosa", "Ruido Marrón"]
-                respuesta_correcta = f"Ruido {'Blanco' if sonido == 'blanco' else 'Rosa' if sonido == 'rosa' else 'Marrón'}"
-            elif sonido in ["lluvia", "olas", "bosque"]:
-                opciones = ["Lluvia", "Olas del mar", "Bosque"]
-                respuesta_correcta = "Lluvia" if sonido == "lluvia" else "Olas del mar" if sonido == "olas" else "Bosque"
-            else:  # sonidos de animales
-                opciones = ["Perro", "Gato", "Pájaro"]
-                respuesta_correcta = "Perro" if sonido == "perro" else "Gato" if sonido == "gato" else "Pájaro"
-            
-            random.shuffle(opciones)
-            seleccion = tk.StringVar()
-            
-            # Frame para opciones
-            options_frame = tk.Frame(main_frame, bg=COLOR_FONDO)
-            options_frame.pack(expand=True, pady=15)
-            
-            # Radiobuttons para opciones
-            for opcion in opciones:
-                tk.Radiobutton(options_frame, text=opcion, variable=seleccion,
-                              value=opcion, font=FUENTE_BOTON, bg=COLOR_FONDO,
-                              activebackground=COLOR_FONDO).pack(anchor=tk.W, padx=30, pady=8)
-            
-            def verificar():
-                if not seleccion.get():
-                    messagebox.showwarning("Advertencia", "Por favor selecciona una opción")
-                    return
-                
-                if seleccion.get() == respuesta_correcta:
-                    mensaje = "¡Correcto! Has identificado bien el sonido."
-                    icon = "info"
-                else:
-                    mensaje = f"Incorrecto. El sonido era: {respuesta_correcta}"
-                    icon = "warning"
-                
-                messagebox.showinfo("Resultado", mensaje) if icon == "info" else messagebox.showwarning("Resultado", mensaje)
-                self.clear_and_setup()
-            
-            def repetir_sonido():
-                if sonido in ["blanco", "rosa", "marrón"]:
-                    self.reproducir_ruido(sonido)
-                else:
-                    self.reproducir_sonido(sonido)
-            
-            # Frame para botones
-            buttons_frame = tk.Frame(main_frame, bg=COLOR_FONDO)
-            buttons_frame.pack(side=tk.BOTTOM, pady=15)
-            
-            # Botón repetir
-            SemicuadradoButton(buttons_frame, 
-                text="🔊 Repetir", 
-                bg="#FFA500", active_bg="#FF8C00",
-                width=100, height=50, corner_radius=15,
-                command=repetir_sonido).pack(side=tk.LEFT, padx=8)
-            
-            # Botón verificar
-            SemicuadradoButton(buttons_frame, 
-                text="✓ Verificar", 
-                bg="#2ECC71", active_bg="#27AE60",
-                width=100, height=50, corner_radius=15,
-                command=verificar).pack(side=tk.LEFT, padx=8)
-            
-            # Botón volver
-            SemicuadradoButton(buttons_frame, 
-                text="← Volver", 
-                bg=COLOR_BOTON_VOLVER, active_bg=COLOR_BOTON_VOLVER_ACTIVO,
-                width=100, height=50, corner_radius=15,
-                command=self.clear_and_setup).pack(side=tk.LEFT, padx=8)
+        # La pantalla se construye una vez; solo las opciones cambian
+        self.pantallas.mostrar("pregunta", self.setup_pregunta)
+        self.actualizar_opciones()
+        self.ejercicio_actual.pedir_respuesta()
+
+    def on_evento_ejercicio(self, ejercicio, evento, datos):
+        if evento == "reproducir":
+            if datos["sonido"] in ["blanco", "rosa", "marrón"]:
+                self.reproducir_ruido(datos["sonido"])
+            else:
+                self.reproducir_sonido(datos["sonido"])
+
+    def setup_pregunta(self, pantalla):
+        # Frame principal
+        main_frame = tk.Frame(pantalla, bg=COLOR_FONDO)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
         
-        self.clear_window_and_show_content(setup_pregunta)
+        # Título
+        tk.Label(main_frame, text="¿Qué sonido escuchaste?", 
+                font=FUENTE_TITULO, bg=COLOR_FONDO).pack(pady=15)
+        
+        self.seleccion = tk.StringVar(master=pantalla)
+        
+        # Frame para opciones
+        self.opciones_frame = tk.Frame(main_frame, bg=COLOR_FONDO)
+        self.opciones_frame.pack(expand=True, pady=15)
+        
+        # Frame para botones
+        buttons_frame = tk.Frame(main_frame, bg=COLOR_FONDO)
+        buttons_frame.pack(side=tk.BOTTOM, pady=15)
+        
+        # Botón repetir
+        SemicuadradoButton(buttons_frame, 
+            text="🔊 Repetir", 
+            bg="#FFA500", active_bg="#FF8C00",
+            width=100, height=50, corner_radius=15,
+            command=self.repetir_sonido).pack(side=tk.LEFT, padx=8)
+        
+        # Botón verificar
+        SemicuadradoButton(buttons_frame, 
+            text="✓ Verificar", 
+            bg="#2ECC71", active_bg="#27AE60",
+            width=100, height=50, corner_radius=15,
+            command=self.verificar_respuesta).pack(side=tk.LEFT, padx=8)
+        
+        # Botón volver
+        SemicuadradoButton(buttons_frame, 
+            text="← Volver", 
+            bg=COLOR_BOTON_VOLVER, active_bg=COLOR_BOTON_VOLVER_ACTIVO,
+            width=100, height=50, corner_radius=15,
+            command=self.clear_and_setup).pack(side=tk.LEFT, padx=8)
+
+    def actualizar_opciones(self):
+        """Reconstruye solo las opciones de la pregunta del ejercicio actual"""
+        self.seleccion.set("")
+        
+        for widget in self.opciones_frame.winfo_children():
+            widget.destroy()
+        
+        # Radiobuttons para opciones
+        for opcion in self.ejercicio_actual.opciones:
+            tk.Radiobutton(self.opciones_frame, text=opcion, variable=self.seleccion,
+                          value=opcion, font=FUENTE_BOTON, bg=COLOR_FONDO,
+                          activebackground=COLOR_FONDO).pack(anchor=tk.W, padx=30, pady=8)
+
+    def verificar_respuesta(self):
+        if not self.seleccion.get():
+            messagebox.showwarning("Advertencia", "Por favor selecciona una opción")
+            return
+        
+        resultado = self.ejercicio_actual.responder(self.seleccion.get())
+        if resultado["correcta"]:
+            mensaje = "¡Correcto! Has identificado bien el sonido."
+            icon = "info"
+        else:
+            mensaje = f"Incorrecto. El sonido era: {resultado['esperada']}"
+            icon = "warning"
+        
+        messagebox.showinfo("Resultado", mensaje) if icon == "info" else messagebox.showwarning("Resultado", mensaje)
+        self.clear_and_setup()
+
+    def repetir_sonido(self):
+        self.ejercicio_actual.repetir()
 
 class TerapiaVisual:
+    # Fondo de la animación del círculo: paleta, pasos entre colores y ritmo
+    paleta_fondo = "arcoiris"
+    pasos_color = 100
+    segundos_por_color = 5.0
+    # Recorrido del círculo (ver Trayectoria.PATRONES) y su velocidad en px/s
+    patron_trayectoria = "rectangulo"
+    velocidad_trayectoria = 240  # antes 12 px cada 50 ms
+
     def __init__(self, root, parent_window=None):
         self.root = root
         self.parent_window = parent_window
         self.root.title("Terapia Visual")
         self.root.geometry("700x450")  # Reduced from 1024x600
         self.root.configure(bg=COLOR_FONDO)
+        file_manager.refresh_assets()
+        self.reloj_animacion = None
+        self.pantallas = ScreenManager(self.root, "visual")
+        self.ejercicio_actual = None
         self.clear_and_setup()
 
     def clear_and_setup(self):
-        # Clear all widgets
-        for widget in self.root.winfo_children():
-            widget.destroy()
-        self.setup_ui()
+        if self.reloj_animacion is not None:
+            self.reloj_animacion.detener()
+            self.reloj_animacion = None
+        if self.ejercicio_actual is not None:
+            self.ejercicio_actual.cancelar()
+            self.ejercicio_actual = None
+        self.root.configure(bg=COLOR_FONDO)
+        self.pantallas.mostrar("menu", self.setup_ui)
 
-    def setup_ui(self):
+    def setup_ui(self, pantalla):
         # Frame principal
-        main_frame = tk.Frame(self.root, bg=COLOR_FONDO)
+        main_frame = tk.Frame(pantalla, bg=COLOR_FONDO)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
         
         # Título
@@ -588,23 +2900,25 @@ class TerapiaVisual:
 
     def volver_menu_principal(self):
         """Vuelve al menú principal"""
-        self.root.destroy()
+        # Corta el visualizador o la animación que siga en curso
+        self.cancelar_visor()
+        # La ventana se oculta y se reutiliza la próxima vez
+        self.root.withdraw()
         if self.parent_window:
             self.parent_window.deiconify()
 
     def abrir_pre_rehabilitacion(self):
         try:
             def setup_espera():
-                # Clear current content
-                for widget in self.root.winfo_children():
-                    widget.destroy()
+                pantalla = self.pantallas.mostrar_dinamica()
                 
                 # Frame principal
-                main_frame = tk.Frame(self.root, bg=COLOR_FONDO)
+                main_frame = tk.Frame(pantalla, bg=COLOR_FONDO)
                 main_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
                 
-                tk.Label(main_frame, text="Preparando sesión de relajación...", 
-                        font=FUENTE_SUBTITULO, bg=COLOR_FONDO).pack(pady=15)
+                estado = tk.Label(main_frame, text="Preparando sesión de relajación...", 
+                                  font=FUENTE_SUBTITULO, bg=COLOR_FONDO)
+                estado.pack(pady=15)
                 
                 progress = ttk.Progressbar(main_frame, orient="horizontal", 
                                          length=250, mode="indeterminate")
@@ -616,101 +2930,50 @@ class TerapiaVisual:
                     text="← Cancelar", 
                     bg=COLOR_BOTON_VOLVER, active_bg=COLOR_BOTON_VOLVER_ACTIVO,
                     width=120, height=50, corner_radius=15,
-                    command=self.clear_and_setup).pack(pady=15)
+                    command=self.cancelar_visor).pack(pady=15)
+                
+                def on_mensaje(tipo, *datos):
+                    if tipo == "listo":
+                        estado.config(text="Sesión de relajación en curso")
+                        progress.stop()
+                        progress.config(mode="determinate", maximum=VisorRelajacion.DURACION,
+                                        value=0)
+                    elif tipo == "progreso":
+                        restante = datos[0]
+                        mins, secs = divmod(restante, 60)
+                        estado.config(text=f"Sesión de relajación en curso - {mins:02d}:{secs:02d}")
+                        progress.config(value=VisorRelajacion.DURACION - restante)
+                    elif tipo == "fin":
+                        self.sesion_visor = None
+                        resultado = datos[0]
+                        if resultado.get("error"):
+                            messagebox.showerror("Error", f"Error durante la visualización: "
+                                                          f"{resultado['error']}")
+                            self.clear_and_setup()
+                        else:
+                            self.mostrar_resultado(
+                                "¡Sesión de relajación completada!\n"
+                                "Esperamos que hayas disfrutado las imágenes", 
+                                None, self.root
+                            )
                 
-                # Ejecutar pygame después de 2 segundos
-                self.root.after(2000, self.run_pygame_viewer)
+                # El visualizador corre en otro proceso: Tk sigue respondiendo
+                # y un fallo de SDL no puede cerrar la aplicación
+                self.sesion_visor = viewer_supervisor.iniciar(self.root, on_mensaje)
             
-            setup_espera()
+            with metrics.span("pantalla.visual.espera.construir"):
+                setup_espera()
             
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo iniciar el visualizador: {str(e)}")
 
-    def run_pygame_viewer(self):
-        try:
-            resource_manager.init_pygame()
-            
-            WIDTH, HEIGHT = 700, 450  # Reduced size
-            screen = pygame.display.set_mode((WIDTH, HEIGHT))
-            pygame.display.set_caption("Cascadas y Bosques - Relajación Visual")
-
-            # Cargar imágenes o crear fondos alternativos
-            image_files = ["cascada1.jpg", "bosque1.jpg", "cascadabosque.jpg"]
-            images = []
-            
-            for i, img_file in enumerate(image_files):
-                try:
-                    path = file_manager.get_image_path(img_file)
-                    if file_manager.image_exists(img_file):
-                        img = pygame.image.load(path)
-                        img = pygame.transform.smoothscale(img, (WIDTH, HEIGHT))
-                        images.append(img)
-                    else:
-                        # Crear imagen alternativa
-                        colors = [(0, 100, 200), (0, 150, 0), (0, 120, 100)]
-                        img = pygame.Surface((WIDTH, HEIGHT))
-                        img.fill(colors[i])
-                        images.append(img)
-                except Exception:
-                    # Fallback color
-                    colors = [(0, 100, 200), (0, 150, 0), (0, 120, 100)]
-                    img = pygame.Surface((WIDTH, HEIGHT))
-                    img.fill(colors[i % len(colors)])
-                    images.append(img)
-
-            current_image = 0
-            last_change = time.time()
-            change_interval = 30
-            start_time = time.time()
-            duration = 90
-
-            clock = pygame.time.Clock()
-            running = True
-
-            while running:
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
-                        running = False
-                
-                # Cambiar imagen cada 30 segundos
-                if time.time() - last_change >= change_interval and len(images) > 1:
-                    current_image = (current_image + 1) % len(images)
-                    last_change = time.time()
-                
-                screen.blit(images[current_image], (0, 0))
-                
-                # Mostrar información - Smaller font
-                font = pygame.font.SysFont('Arial', 20)
-                elapsed = time.time() - start_time
-                remaining = max(0, duration - elapsed)
-                mins, secs = divmod(int(remaining), 60)
-                timer_text = font.render(f"Tiempo: {mins:02d}:{secs:02d}", True, (255, 255, 255))
-                screen.blit(timer_text, (15, 15))
-                
-                if len(images) > 1:
-                    img_text = font.render(f"Imagen {current_image + 1}/{len(images)}", True, (255, 255, 255))
-                    screen.blit(img_text, (15, 40))
-                
-                # Instrucciones
-                inst_text = font.render("Presiona ESC para salir", True, (255, 255, 255))
-                screen.blit(inst_text, (15, HEIGHT - 30))
-                
-                pygame.display.flip()
-                clock.tick(30)
-                
-                if elapsed >= duration:
-                    running = False
-
-            pygame.quit()
-            
-            self.mostrar_resultado(
-                "¡Sesión de relajación completada!\n"
-                "Esperamos que hayas disfrutado las imágenes", 
-                None, self.root
-            )
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error durante la visualización: {str(e)}")
+    def cancelar_visor(self):
+        """Cierra el visualizador en curso y vuelve al menú"""
+        sesion = getattr(self, "sesion_visor", None)
+        if sesion is not None:
+            sesion.detener(notificar=False)
+            self.sesion_visor = None
+        self.clear_and_setup()
 
     def abrir_rehabilitacion(self):
         self.animacion_circulo()
@@ -720,14 +2983,10 @@ class TerapiaVisual:
 
     def animacion_circulo(self):
         def setup_animacion():
-            # Clear current content
-            for widget in self.root.winfo_children():
-                widget.destroy()
-            
-            self.root.configure(bg="black")
+            pantalla = self.pantallas.mostrar_dinamica(bg="black")
             
             # Frame para controles
-            controls_frame = tk.Frame(self.root, bg="black")
+            controls_frame = tk.Frame(pantalla, bg="black")
             controls_frame.pack(side=tk.TOP, fill=tk.X, padx=8, pady=4)
             
             # Botón volver (esquina superior izquierda)
@@ -742,122 +3001,101 @@ class TerapiaVisual:
             label_tiempo.pack(side=tk.RIGHT)
             
             # Canvas para la animación - Reduced size
-            canvas = tk.Canvas(self.root, width=700, height=400, highlightthickness=0, bg="black")
+            canvas = tk.Canvas(pantalla, width=700, height=400, highlightthickness=0, bg="black")
             canvas.pack()
             
             # Configuración del círculo - Adjusted for smaller canvas
             radio = 25
             centro_x, centro_y = 350, 200
             amplitud_x, amplitud_y = 280, 140
+            duracion = 90
             
-            pos_x, pos_y = centro_x, centro_y
-            direccion = "derecha"
+            # Recorrido precalculado: cada tick solo interpola dos muestras
+            # Cada sesión sortea sus propias fijaciones en el patrón de sacadas
+            trayectoria = Trayectoria.obtener(self.patron_trayectoria, (centro_x, centro_y),
+                                              (amplitud_x, amplitud_y), self.velocidad_trayectoria,
+                                              semilla=random.randrange(2**32))
+            posicion = trayectoria.posicion
 
+            pos_x, pos_y = centro_x, centro_y
             circulo = canvas.create_oval(pos_x-radio, pos_y-radio, pos_x+radio, pos_y+radio, 
                                        fill="blue", outline="white", width=2)
             
-            # Colores para el fondo
-            colores = ["#FF0000", "#FF7F00", "#FFFF00", "#00FF00", 
-                      "#0000FF", "#4B0082", "#9400D3"]
-            current_color_idx = 0
-            next_color_idx = 1
-            blend_factor = 0.0
-            color_steps = 100
+            # Colores para el fondo, precalculados una sola vez
+            degradado = GradientLUT.obtener(PALETAS_FONDO[self.paleta_fondo], self.pasos_color)
             
-            def get_current_color():
-                def hex_to_rgb(hex_color):
-                    return tuple(int(hex_color[i:i+2], 16) for i in (1, 3, 5))
-                
-                def rgb_to_hex(rgb):
-                    return '#%02x%02x%02x' % rgb
-                
-                rgb1 = hex_to_rgb(colores[current_color_idx])
-                rgb2 = hex_to_rgb(colores[next_color_idx])
-                new_rgb = tuple(int(rgb1[i] + (rgb2[i] - rgb1[i]) * blend_factor) for i in range(3))
-                return rgb_to_hex(new_rgb)
+            estado = {"color": None, "restante": None}
             
-            def mover_circulo():
-                nonlocal pos_x, pos_y, direccion
-                
-                if direccion == "derecha":
-                    pos_x += 12
-                    if pos_x >= centro_x + amplitud_x:
-                        direccion = "abajo"
-                elif direccion == "abajo":
-                    pos_y += 12
-                    if pos_y >= centro_y + amplitud_y:
-                        direccion = "izquierda"
-                elif direccion == "izquierda":
-                    pos_x -= 12
-                    if pos_x <= centro_x - amplitud_x:
-                        direccion = "arriba"
-                elif direccion == "arriba":
-                    pos_y -= 12
-                    if pos_y <= centro_y - amplitud_y:
-                        direccion = "derecha"
-                
+            def tick(t):
+                """Calcula posición, color y tiempo restante a partir de t"""
+                pos_x, pos_y = posicion(t)
                 canvas.coords(circulo, pos_x-radio, pos_y-radio, pos_x+radio, pos_y+radio)
-                if self.root.winfo_exists():
-                    self.root.after(50, mover_circulo)
-            
-            def cambiar_fondo():
-                nonlocal current_color_idx, next_color_idx, blend_factor
-                
-                blend_factor += 1.0/color_steps
-                
-                if blend_factor >= 1.0:
-                    blend_factor = 0.0
-                    current_color_idx = next_color_idx
-                    next_color_idx = (next_color_idx + 1) % len(colores)
                 
-                try:
-                    nuevo_color = get_current_color()
-                    self.root.configure(bg=nuevo_color)
+                nuevo_color = degradado.color(t / self.segundos_por_color)
+                if nuevo_color != estado["color"]:
+                    pantalla.configure(bg=nuevo_color)
                     canvas.configure(bg=nuevo_color)
                     controls_frame.configure(bg=nuevo_color)
                     label_tiempo.configure(bg=nuevo_color)
-                    if self.root.winfo_exists():
-                        self.root.after(50, cambiar_fondo)
-                except:
-                    pass
-            
-            # Timer
-            tiempo_inicio = time.time()
-            
-            def actualizar_tiempo():
-                try:
-                    tiempo_transcurrido = time.time() - tiempo_inicio
-                    tiempo_restante = max(0, 90 - int(tiempo_transcurrido))
-                    
+                    estado["color"] = nuevo_color
+                
+                tiempo_restante = max(0, duracion - int(t))
+                if tiempo_restante != estado["restante"]:
+                    estado["restante"] = tiempo_restante
                     minutos = tiempo_restante // 60
                     segundos = tiempo_restante % 60
                     label_tiempo.config(text=f"{minutos:02d}:{segundos:02d}")
-                    
                     if tiempo_restante <= 0:
+                        self.reloj_animacion.detener()
                         self.mostrar_resultado("¡Tiempo completado!\nEl círculo terminó su recorrido", 
                                              None, self.root)
-                    elif self.root.winfo_exists():
-                        self.root.after(1000, actualizar_tiempo)
-                except:
-                    pass
             
-            # Iniciar animaciones
-            mover_circulo()
-            cambiar_fondo()
-            actualizar_tiempo()
+            self.reloj_animacion = AnimationClock(self.root, tick)
+            
+            def alternar_pausa():
+                if self.reloj_animacion.pausado():
+                    self.reloj_animacion.reanudar()
+                    boton_pausa.draw_button("⏸ Pausa")
+                else:
+                    self.reloj_animacion.pausar()
+                    boton_pausa.draw_button("▶ Seguir")
+            
+            boton_pausa = SemicuadradoButton(controls_frame, text="⏸ Pausa", 
+                              bg=COLOR_BOTON_PRINCIPAL, active_bg=COLOR_BOTON_PRINCIPAL_ACTIVO,
+                              width=80, height=40, corner_radius=20,
+                              command=alternar_pausa)
+            boton_pausa.pack(side=tk.LEFT, padx=8)
+            
+            def siguiente_patron():
+                # Reinicia el ejercicio con el patrón siguiente
+                patrones = list(Trayectoria.PATRONES)
+                indice = patrones.index(self.patron_trayectoria)
+                self.patron_trayectoria = patrones[(indice + 1) % len(patrones)]
+                self.reloj_animacion.detener()
+                self.animacion_circulo()
+            
+            SemicuadradoButton(controls_frame, 
+                              text=Trayectoria.PATRONES[self.patron_trayectoria], 
+                              bg="#9B59B6", active_bg="#8E44AD",
+                              width=110, height=40, corner_radius=20,
+                              command=siguiente_patron).pack(side=tk.LEFT)
+            
+            # Iniciar animación
+            self.reloj_animacion.iniciar()
         
-        setup_animacion()
+        with metrics.span("pantalla.visual.animacion.construir"):
+            setup_animacion()
 
     def abrir_juego_frutas(self):
+        # Frutas, respuesta y tiempos los decide el motor de ejercicios
+        juego = EjercicioContarManzanas()
+        self.ejercicio_actual = juego
+        
         def setup_juego():
-            # Clear current content
-            for widget in self.root.winfo_children():
-                widget.destroy()
-            
-            self.root.configure(bg="lightyellow")
+            pantalla = self.pantallas.mostrar_dinamica(bg="lightyellow")
 
             # Frame para controles superiores
-            top_frame = tk.Frame(self.root, bg="lightyellow")
+            top_frame = tk.Frame(pantalla, bg="lightyellow")
             top_frame.pack(side=tk.TOP, fill=tk.X, padx=8, pady=4)
             
             # Botón volver
@@ -871,38 +3109,32 @@ class TerapiaVisual:
                     font=FUENTE_SUBTITULO, bg="lightyellow").pack(side=tk.RIGHT)
 
             # Canvas para el juego - Reduced size
-            canvas = tk.Canvas(self.root, width=700, height=400, bg="lightyellow")
+            canvas = tk.Canvas(pantalla, width=700, height=400, bg="lightyellow")
             canvas.pack()
 
-            # Generar frutas
-            total_manzanas = random.randint(3, 7)
-            total_mandarinas = random.randint(5, 10)
-
+            radio = 25
             # Crear manzanas (rojas) - Adjusted positions for smaller canvas
-            for _ in range(total_manzanas):
-                x = random.randint(40, 660)
-                y = random.randint(40, 360)
-                radio = 25
+            for x, y in juego.manzanas:
                 canvas.create_oval(x - radio, y - radio, x + radio, y + radio, 
                                  fill="red", outline="darkred", width=2)
 
             # Crear mandarinas (naranjas)
-            for _ in range(total_mandarinas):
-                x = random.randint(40, 660)
-                y = random.randint(40, 360)
-                radio = 25
+            for x, y in juego.mandarinas:
                 canvas.create_oval(x - radio, y - radio, x + radio, y + radio, 
                                  fill="orange", outline="darkorange", width=2)
+            
+            juego.iniciar()
 
             def mostrar_pregunta():
-                # Clear current content
-                for widget in self.root.winfo_children():
-                    widget.destroy()
+                # Si el usuario salió del juego antes de tiempo no hay pregunta
+                if not canvas.winfo_exists() or juego.estado != "estimulo":
+                    return
+                juego.pedir_respuesta()
                 
-                self.root.configure(bg="lightyellow")
+                pantalla = self.pantallas.mostrar_dinamica(bg="lightyellow")
                 
                 # Frame principal para la pregunta
-                main_frame = tk.Frame(self.root, bg="lightyellow")
+                main_frame = tk.Frame(pantalla, bg="lightyellow")
                 main_frame.pack(expand=True, fill=tk.BOTH, padx=15, pady=15)
                 
                 # Título
@@ -959,7 +3191,8 @@ class TerapiaVisual:
                 def verificar():
                     try:
                         respuesta = int(entrada.get())
-                        if respuesta == total_manzanas:
+                        total_manzanas = juego.respuesta_correcta
+                        if juego.responder(respuesta)["correcta"]:
                             resultado = f"¡Excelente vista! Había exactamente {total_manzanas} manzanas."
                             icon = "info"
                         else:
@@ -981,20 +3214,18 @@ class TerapiaVisual:
                                  width=100, height=50, corner_radius=25,
                                  command=verificar).pack(side=tk.LEFT, padx=8)
 
-            # Mostrar pregunta después de 15 segundos (reduced from 20)
-            self.root.after(15000, mostrar_pregunta)
+            # Mostrar pregunta tras el tiempo de observación del ejercicio
+            self.root.after(int(juego.tiempo_observacion * 1000), mostrar_pregunta)
         
-        setup_juego()
+        with metrics.span("pantalla.visual.juego.construir"):
+            setup_juego()
 
     def mostrar_resultado(self, mensaje, ventana_anterior, ventana_padre):
-        # Clear current content and show result
-        for widget in self.root.winfo_children():
-            widget.destroy()
-        
-        self.root.configure(bg="lightblue")
+        # El resultado reemplaza el contenido dinámico actual
+        pantalla = self.pantallas.mostrar_dinamica(bg="lightblue")
 
         # Frame principal
-        main_frame = tk.Frame(self.root, bg="lightblue")
+        main_frame = tk.Frame(pantalla, bg="lightblue")
         main_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
 
         # Mensaje de resultado
@@ -1022,17 +3253,17 @@ class MenuPrincipal:
         self.root.title("Sistema de Rehabilitación")
         self.root.geometry("600x400")  # Reduced from 1024x600
         self.root.configure(bg=COLOR_FONDO)
+        self.pantallas = ScreenManager(self.root, "menu_principal")
+        # Ventanas de terapia ya construidas; se ocultan en lugar de destruirse
+        self.terapias = {}
         self.clear_and_setup()
 
     def clear_and_setup(self):
-        # Clear all widgets
-        for widget in self.root.winfo_children():
-            widget.destroy()
-        self.setup_ui()
+        self.pantallas.mostrar("menu", self.setup_ui)
 
-    def setup_ui(self):
+    def setup_ui(self, pantalla):
         # Frame principal
-        main_frame = tk.Frame(self.root, bg=COLOR_FONDO)
+        main_frame = tk.Frame(pantalla, bg=COLOR_FONDO)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
         
         # Título
@@ -1098,25 +3329,31 @@ class MenuPrincipal:
 
     def volver_ventana_anterior(self):
         """Vuelve a la ventana anterior"""
-        self.root.destroy()
+        self.root.withdraw()
         if self.parent_window:
             self.parent_window.deiconify()
 
     def abrir_terapia_visual(self):
-        self.root.withdraw()
-        ventana_visual = tk.Toplevel()
-        terapia_visual = TerapiaVisual(ventana_visual, self.root)
-        ventana_visual.protocol("WM_DELETE_WINDOW", lambda: self.volver_al_menu(ventana_visual))
+        self.abrir_terapia("visual", TerapiaVisual)
 
     def abrir_terapia_auditiva(self):
-        self.root.withdraw()
-        ventana_auditiva = tk.Toplevel()
-        terapia_auditiva = TerapiaAuditiva(ventana_auditiva, self.root)
-        ventana_auditiva.protocol("WM_DELETE_WINDOW", lambda: self.volver_al_menu(ventana_auditiva))
+        self.abrir_terapia("auditiva", TerapiaAuditiva)
 
-    def volver_al_menu(self, ventana):
-        ventana.destroy()
-        self.root.deiconify()
+    def abrir_terapia(self, nombre, clase):
+        """Muestra la ventana de terapia; solo se construye la primera vez"""
+        self.root.withdraw()
+        terapia = self.terapias.get(nombre)
+        if terapia is not None and terapia.root.winfo_exists():
+            # La ventana se reutiliza, pero los recursos pueden haber cambiado
+            file_manager.refresh_assets()
+            terapia.root.deiconify()
+            terapia.clear_and_setup()
+            return
+        ventana = tk.Toplevel()
+        terapia = clase(ventana, self.root)
+        self.terapias[nombre] = terapia
+        # Cerrar la ventana equivale a volver: se oculta y se conserva
+        ventana.protocol("WM_DELETE_WINDOW", terapia.volver_menu_principal)
 
 class Bienvenida:
     def __init__(self, root):
@@ -1169,28 +3406,28 @@ class Bienvenida:
 
     def abrir_menu_principal(self):
         self.root.withdraw()
+        # El menú se construye una vez y se vuelve a mostrar en las siguientes
+        menu = getattr(self, "menu_principal", None)
+        if menu is not None and menu.root.winfo_exists():
+            menu.root.deiconify()
+            return
         ventana_principal = tk.Toplevel()
-        menu_principal = MenuPrincipal(ventana_principal, self.root)
-        ventana_principal.protocol("WM_DELETE_WINDOW", lambda: self.volver_a_bienvenida(ventana_principal))
-
-    def volver_a_bienvenida(self, ventana):
-        ventana.destroy()
-        self.root.deiconify()
+        self.menu_principal = MenuPrincipal(ventana_principal, self.root)
+        ventana_principal.protocol("WM_DELETE_WINDOW", self.menu_principal.volver_ventana_anterior)
 
 def verificar_dependencias():
     """Verifica que todas las dependencias estén instaladas"""
     dependencias = {
         'pyaudio': 'pyaudio',
         'numpy': 'numpy', 
-        'pygame': 'pygame',
-        'PIL': 'pillow'
+        'pygame': 'pygame'
     }
     
+    # Solo se comprueba que estén instalados; importarlos aquí retrasaría
+    # la primera ventana
     faltantes = []
     for modulo, paquete in dependencias.items():
-        try:
-            __import__(modulo)
-        except ImportError:
+        if importlib.util.find_spec(modulo) is None:
             faltantes.append(paquete)
     
     if faltantes:
@@ -1203,7 +3440,34 @@ def verificar_dependencias():
     
     return True
 
+def informar_arranque(root):
+    """Imprime cuánto tardó en dibujarse la primera ventana"""
+    root.update_idletasks()
+    transcurrido = (time.perf_counter() - _INICIO_ARRANQUE) * 1000
+    pesados = [nombre for nombre in ("numpy", "pygame", "pyaudio")
+               if nombre in sys.modules]
+    print(f"Primera ventana en {transcurrido:.0f} ms "
+          f"(módulos pesados cargados: {', '.join(pesados) or 'ninguno'})",
+          file=sys.stderr)
+
+def ejecutar_estaciones_virtuales(cantidad):
+    """Prueba de carga sin interfaz: muchas estaciones en un solo proceso"""
+    # Los resultados simulados no se mezclan con los de pacientes reales
+    almacen = ResultStore(os.path.join(file_manager.base_dir, "resultados_simulacion.sqlite3"))
+    inicio = time.perf_counter()
+    estaciones = asyncio.run(simular_estaciones(cantidad, almacen=almacen))
+    almacen.cerrar(timeout=30)
+    resultados = [r for estacion in estaciones for r in estacion.resultados]
+    aciertos = sum(r["correcta"] for r in resultados)
+    print(f"{cantidad} estaciones, {len(resultados)} ejercicios ({aciertos} correctos) "
+          f"en {time.perf_counter() - inicio:.1f} s; resultados en {almacen.ruta}")
+
 def main():
+    if "--estaciones-virtuales" in sys.argv:
+        indice = sys.argv.index("--estaciones-virtuales")
+        ejecutar_estaciones_virtuales(int(sys.argv[indice + 1]) if len(sys.argv) > indice + 1 else 10)
+        return
+    
     # Verificar dependencias
     if not verificar_dependencias():
         sys.exit(1)
@@ -1213,22 +3477,36 @@ def main():
     
     # Configurar el cierre de la aplicación
     def on_closing():
+        audio_player.cerrar()
+        viewer_supervisor.detener_todas()
+        image_loader.cerrar()
+        result_store.cerrar()
         resource_manager.cleanup_pyaudio()
-        resource_manager.cleanup_pygame()
         root.quit()
     
     root.protocol("WM_DELETE_WINDOW", on_closing)
+    audio_player.vincular_tk(root)
     
     # Iniciar aplicación
-    app = Bienvenida(root)
+    with metrics.span("pantalla.bienvenida.construir"):
+        app = Bienvenida(root)
+    
+    if os.environ.get("ROBOTIX_MEDIR_ARRANQUE") or "--medir-arranque" in sys.argv:
+        root.after_idle(lambda: informar_arranque(root))
+    if metrics.activo:
+        root.after_idle(lambda: (root.update_idletasks(),
+                                 metrics.registrar_desde("arranque.primera_ventana",
+                                                         _INICIO_ARRANQUE)))
     
     try:
         root.mainloop()
     except KeyboardInterrupt:
         print("\nCerrando aplicación...")
     finally:
+        audio_player.cerrar()
+        viewer_supervisor.detener_todas()
+        result_store.cerrar()
         resource_manager.cleanup_pyaudio()
-        resource_manager.cleanup_pygame()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file